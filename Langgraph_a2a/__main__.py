@@ -4,21 +4,12 @@ import os
 import sys
 
 import click
-import httpx
 import uvicorn
 from dotenv import load_dotenv
 
-from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import (
-    BasePushNotificationSender,
-    InMemoryPushNotificationConfigStore,
-    InMemoryTaskStore,
-)
-from a2a.types import AgentCapabilities, AgentCard, AgentSkill
-
-from langgraph_agent import  graph as LegalAssistantAgent
-from lanatoa import LegalAssistantExecutor
+from a2a_app import DEFAULT_DRAIN_TIMEOUT, build_app
+from lanatoa import DEFAULT_MAX_CONCURRENCY, DEFAULT_MAX_QUEUE
+from task_store import SqliteTaskStore
 
 load_dotenv()
 
@@ -33,60 +24,53 @@ class MissingAPIKeyError(Exception):
 @click.command()
 @click.option('--host', 'host', default='localhost')
 @click.option('--port', 'port', default=10001)
-def main(host, port):
+@click.option('--max-concurrency', 'max_concurrency', default=DEFAULT_MAX_CONCURRENCY, help='Graph runs executed at the same time (per worker).')
+@click.option('--max-queue', 'max_queue', default=DEFAULT_MAX_QUEUE, help='Requests allowed to wait for a slot before new ones are rejected (per worker).')
+@click.option('--task-store', 'task_store', type=click.Choice(['sqlite', 'memory']), default=os.getenv('A2A_TASK_STORE', 'sqlite'), help='Where task state is kept: a local SQLite file with eviction of finished tasks, or process memory.')
+@click.option('--workers', 'workers', default=1, help='Server processes, each with its own graph and MCP client. Requires the sqlite task store when above 1.')
+@click.option('--drain-timeout', 'drain_timeout', default=DEFAULT_DRAIN_TIMEOUT, help='Seconds in-flight tasks get to finish on shutdown.')
+def main(host, port, max_concurrency, max_queue, task_store, workers, drain_timeout):
     """Starts the Legal Assistant Agent server."""
     try:
         if not os.getenv('GOOGLE_API_KEY'):
             raise MissingAPIKeyError(
                 'GOOGLE_API_KEY environment variable not set.'
             )
-
-        # Define capabilities and skills
-        capabilities = AgentCapabilities(streaming=True, push_notifications=True)
-        skill = AgentSkill(
-            id='legal_advice',
-            name='Legal Assistant Tool',
-            description='Provides legal guidance by using a pdf document as a reference, or by comparing legal texts, or by checking jurisdiction, or by formatting a text into a legal word document.',
-            tags=['legal', 'compliance', 'guidance'],
-            examples=['What are the sick days policies in this contract?'],
-        )
-        agent_card = AgentCard(
-            name='Legal Assistant Agent',
-            description='Helps users with legal queries and advice',
-            url=f'http://{host}:{port}/',
-            version='1.0.0',
-            default_input_modes=["text"],
-            default_output_modes=["text"],
-            capabilities=capabilities,
-            skills=[skill],
-        )
-
-        # --8<-- [start:DefaultRequestHandler]
-        httpx_client = httpx.AsyncClient()
-        push_config_store = InMemoryPushNotificationConfigStore()
-        push_sender = BasePushNotificationSender(
-            httpx_client=httpx_client,
-            config_store=push_config_store
+        if workers > 1 and task_store != 'sqlite':
+            raise click.UsageError('--workers above 1 needs --task-store sqlite so every worker sees every task.')
+
+        if task_store == 'sqlite':
+            # Tasks of a previous run whose workers are gone; other live instances sharing the file keep theirs
+            interrupted = SqliteTaskStore()
+            interrupted.fail_interrupted()
+            interrupted.close()
+
+        if workers == 1:
+            app = build_app(host, port, max_concurrency, max_queue, task_store, drain_timeout)
+            uvicorn.run(app, host=host, port=port, timeout_graceful_shutdown=drain_timeout)
+            return
+
+        # Worker processes build their own app (graph, MCP pool, executor) from these settings
+        os.environ.update({
+            'A2A_HOST': host,
+            'A2A_PORT': str(port),
+            'A2A_MAX_CONCURRENCY': str(max_concurrency),
+            'A2A_MAX_QUEUE': str(max_queue),
+            'A2A_TASK_STORE': task_store,
+            'A2A_DRAIN_TIMEOUT': str(drain_timeout),
+        })
+        uvicorn.run(
+            'a2a_app:create_app',
+            factory=True,
+            host=host,
+            port=port,
+            workers=workers,
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+            timeout_graceful_shutdown=drain_timeout,
         )
-        try:
-            request_handler = DefaultRequestHandler(
-                agent_executor=LegalAssistantExecutor(),
-                task_store=InMemoryTaskStore(),
-                push_config_store=push_config_store,
-                push_sender=push_sender
-            )
-        except Exception as e:
-            logger.error(f'Error initializing request handler: {e}')
-            sys.exit(1)
-
-        server = A2AStarletteApplication(
-            agent_card=agent_card,
-            http_handler=request_handler
-        )
-
-        uvicorn.run(server.build(), host=host, port=port)
-        # --8<-- [end:DefaultRequestHandler]
 
+    except click.UsageError:
+        raise
     except MissingAPIKeyError as e:
          logger.error(f'Error: {e}')
          sys.exit(1)
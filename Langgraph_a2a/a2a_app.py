@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
+import httpx
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import (
+    BasePushNotificationSender,
+    InMemoryPushNotificationConfigStore,
+    InMemoryTaskStore,
+)
+from a2a.types import AgentCapabilities, AgentCard, AgentSkill
+
+from lanatoa import DEFAULT_MAX_CONCURRENCY, DEFAULT_MAX_QUEUE, LegalAssistantExecutor
+from langgraph_agent import tool_pool
+from task_store import SqlitePushNotificationConfigStore, SqliteTaskStore, StoreBackedQueueManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DRAIN_TIMEOUT = float(os.getenv("A2A_DRAIN_TIMEOUT", 60))
+
+
+def build_app(
+    host: str,
+    port: int,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    max_queue: int = DEFAULT_MAX_QUEUE,
+    task_store: str = "sqlite",
+    drain_timeout: float = DEFAULT_DRAIN_TIMEOUT,
+):
+    """Build the A2A Starlette app for the Legal Assistant Agent.
+
+    Each call creates its own executor; the graph and MCP pool are per
+    process. With task_store="sqlite", task state and push notification
+    configs live in the shared SQLite file, so any worker can answer status,
+    resubscribe, cancel and push-config requests (cancels reach the owning
+    worker through the store). On shutdown the executor stops admitting
+    tasks and waits up to `drain_timeout` seconds for running ones to finish.
+    """
+    # Define capabilities and skills
+    capabilities = AgentCapabilities(streaming=True, push_notifications=True)
+    skill = AgentSkill(
+        id='legal_advice',
+        name='Legal Assistant Tool',
+        description='Provides legal guidance by using a pdf document as a reference, or by comparing legal texts, or by checking jurisdiction, or by formatting a text into a legal word document.',
+        tags=['legal', 'compliance', 'guidance'],
+        examples=['What are the sick days policies in this contract?'],
+    )
+    agent_card = AgentCard(
+        name='Legal Assistant Agent',
+        description='Helps users with legal queries and advice',
+        url=f'http://{host}:{port}/',
+        version='1.0.0',
+        default_input_modes=["text"],
+        default_output_modes=["text"],
+        capabilities=capabilities,
+        skills=[skill],
+    )
+
+    # --8<-- [start:DefaultRequestHandler]
+    httpx_client = httpx.AsyncClient()
+    if task_store == 'sqlite':
+        tasks = SqliteTaskStore()
+        queue_manager = StoreBackedQueueManager(tasks)
+        push_config_store = SqlitePushNotificationConfigStore(tasks)
+    else:
+        tasks = InMemoryTaskStore()
+        queue_manager = None
+        push_config_store = InMemoryPushNotificationConfigStore()
+    push_sender = BasePushNotificationSender(
+        httpx_client=httpx_client,
+        config_store=push_config_store
+    )
+    executor = LegalAssistantExecutor(max_concurrency, max_queue, task_store=tasks if task_store == 'sqlite' else None)
+    request_handler = DefaultRequestHandler(
+        agent_executor=executor,
+        task_store=tasks,
+        queue_manager=queue_manager,
+        push_config_store=push_config_store,
+        push_sender=push_sender
+    )
+
+    server = A2AStarletteApplication(
+        agent_card=agent_card,
+        http_handler=request_handler
+    )
+    # --8<-- [end:DefaultRequestHandler]
+
+    @asynccontextmanager
+    async def lifespan(app):
+        watcher = None
+        if isinstance(tasks, SqliteTaskStore):
+            # Heartbeat, cancels requested through other workers, reaping of dead workers' tasks
+            watcher = asyncio.create_task(tasks.watch(executor.cancel_running))
+        yield
+        await executor.drain(drain_timeout)
+        if watcher is not None:
+            watcher.cancel()
+        if isinstance(tasks, SqliteTaskStore):
+            await tasks.flush()
+        await tool_pool.close()
+        await httpx_client.aclose()
+
+    return server.build(lifespan=lifespan)
+
+
+def create_app():
+    """App factory for `uvicorn --workers`; settings come from the A2A_* variables set by main()."""
+    return build_app(
+        host=os.environ["A2A_HOST"],
+        port=int(os.environ["A2A_PORT"]),
+        max_concurrency=int(os.getenv("A2A_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+        max_queue=int(os.getenv("A2A_MAX_QUEUE", DEFAULT_MAX_QUEUE)),
+        task_store=os.getenv("A2A_TASK_STORE", "sqlite"),
+        drain_timeout=DEFAULT_DRAIN_TIMEOUT,
+    )
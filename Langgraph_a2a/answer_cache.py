@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+
+import numpy as np
+
+DEFAULT_THRESHOLD = float(os.getenv("RAG_ANSWER_CACHE_THRESHOLD", 0.95))
+DEFAULT_TTL = float(os.getenv("RAG_ANSWER_CACHE_TTL", 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.getenv("RAG_ANSWER_CACHE_MAX_ENTRIES", 2048))
+
+
+class SemanticAnswerCache:
+    """In-memory answer cache keyed by document identity plus question embedding.
+
+    A lookup compares the (normalized) question vector with every cached
+    question for the same document and returns the best entry if its cosine
+    similarity reaches `threshold`. Entries expire after `ttl` seconds and the
+    least recently used one is dropped once `max_entries` is exceeded.
+
+    Args:
+        threshold (float): Minimum cosine similarity for a near-duplicate question.
+        ttl (float): Seconds an entry stays valid.
+        max_entries (int): Total entries kept across all documents.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._ids = count()
+        self._lru: OrderedDict = OrderedDict()  # entry id -> entry
+        self._by_doc: dict[str, dict[int, dict]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _drop(self, entry_id: int) -> None:
+        entry = self._lru.pop(entry_id)
+        doc_entries = self._by_doc[entry["doc_key"]]
+        del doc_entries[entry_id]
+        if not doc_entries:
+            del self._by_doc[entry["doc_key"]]
+
+    def lookup(self, doc_key: str, vector: np.ndarray):
+        """Best cached entry for a near-duplicate question on the same document, or None.
+
+        Returns:
+            dict | None: entry with "question", "answer", "context" and "similarity".
+        """
+        with self._lock:
+            now = time.time()
+            doc_entries = self._by_doc.get(doc_key, {})
+            for entry_id in [i for i, e in doc_entries.items() if now - e["created"] > self.ttl]:
+                self._drop(entry_id)
+                self.expirations += 1
+            doc_entries = self._by_doc.get(doc_key)
+            if not doc_entries:
+                self.misses += 1
+                return None
+
+            ids = list(doc_entries)
+            matrix = np.stack([doc_entries[i]["vector"] for i in ids])
+            sims = matrix @ vector
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            entry_id = ids[best]
+            self._lru.move_to_end(entry_id)
+            entry = doc_entries[entry_id]
+            return {
+                "question": entry["question"],
+                "answer": entry["answer"],
+                "context": entry["context"],
+                "similarity": float(sims[best]),
+            }
+
+    def store(self, doc_key: str, question: str, vector: np.ndarray, answer: str, context: str) -> None:
+        with self._lock:
+            entry_id = next(self._ids)
+            entry = {
+                "doc_key": doc_key,
+                "question": question,
+                "vector": np.asarray(vector, dtype=np.float32),
+                "answer": answer,
+                "context": context,
+                "created": time.time(),
+            }
+            self._lru[entry_id] = entry
+            self._by_doc.setdefault(doc_key, {})[entry_id] = entry
+            while len(self._lru) > self.max_entries:
+                self._drop(next(iter(self._lru)))
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._lru),
+                "documents": len(self._by_doc),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._by_doc.clear()
@@ -0,0 +1,108 @@
+import os
+
+import numpy as np
+from langchain.schema import Document
+from nltk.tokenize import sent_tokenize
+
+from context_budget import estimate_tokens
+from embedding_service import get_engine
+
+SIMILARITY_THRESHOLD = 0.85
+# Upper bound on chunk size; a chunk is closed early rather than grow past it (0 disables)
+MAX_CHUNK_TOKENS = int(os.getenv("RAG_MAX_CHUNK_TOKENS", 400))
+
+# How chunk vectors are produced:
+#   "mean"     - average of the sentence embeddings the chunker already computed
+#   "reencode" - embed each merged chunk again (the original behaviour)
+CHUNK_EMBEDDING_MODES = ("mean", "reencode")
+
+
+def adjacent_similarities(embeddings: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every sentence with the next one, in one array op.
+
+    Args:
+        embeddings (np.ndarray): (n, dim) sentence embeddings.
+
+    Returns:
+        np.ndarray: (n - 1,) similarities; element i compares sentence i and i + 1.
+    """
+    if len(embeddings) < 2:
+        return np.zeros(0, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    normed = embeddings / np.clip(norms, 1e-12, None)
+    return np.einsum("ij,ij->i", normed[:-1], normed[1:])
+
+
+def chunk_starts(embeddings: np.ndarray, similarity_threshold: float = SIMILARITY_THRESHOLD) -> np.ndarray:
+    """Indices of the sentences that open a new chunk (always includes 0)."""
+    breaks = np.flatnonzero(adjacent_similarities(embeddings) <= similarity_threshold) + 1
+    return np.concatenate(([0], breaks)).astype(np.int64)
+
+
+def cap_chunk_starts(starts: np.ndarray, token_counts, max_tokens: int = MAX_CHUNK_TOKENS) -> np.ndarray:
+    """Add chunk boundaries so no chunk exceeds `max_tokens`.
+
+    Chunks only break between sentences, so a single sentence longer than
+    the cap still becomes one (oversized) chunk.
+    """
+    if max_tokens <= 0:
+        return starts
+    boundaries = set(starts.tolist())
+    capped, size = [], 0
+    for i, tokens in enumerate(token_counts):
+        if i in boundaries or (size and size + tokens > max_tokens):
+            capped.append(i)
+            size = 0
+        size += tokens
+    return np.asarray(capped, dtype=np.int64)
+
+
+def mean_chunk_vectors(embeddings: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Average the sentence embeddings of each chunk."""
+    counts = np.diff(np.append(starts, len(embeddings)))
+    return np.add.reduceat(embeddings, starts, axis=0) / counts[:, None]
+
+
+def semantic_chunks(
+    text: str,
+    similarity_threshold: float = SIMILARITY_THRESHOLD,
+    chunk_embedding: str = "mean",
+    engine=None,
+    max_chunk_tokens: int = MAX_CHUNK_TOKENS,
+):
+    """Split text into semantic chunks and return them with their vectors.
+
+    Sentences are embedded once; boundaries fall wherever two adjacent
+    sentences are not more similar than `similarity_threshold`, or where a
+    chunk would grow past `max_chunk_tokens`.
+
+    Args:
+        text (str): Text to chunk.
+        similarity_threshold (float): Merge threshold for adjacent sentences.
+        chunk_embedding (str): "mean" or "reencode", see CHUNK_EMBEDDING_MODES.
+        engine: EmbeddingEngine to use, defaults to the shared one.
+        max_chunk_tokens (int): Maximum estimated tokens per chunk (0 disables the cap).
+
+    Returns:
+        tuple[list[Document], np.ndarray]: chunks and their (n_chunks, dim) vectors.
+    """
+    if chunk_embedding not in CHUNK_EMBEDDING_MODES:
+        raise ValueError(f"chunk_embedding must be one of {CHUNK_EMBEDDING_MODES}, got {chunk_embedding!r}")
+    engine = engine or get_engine()
+
+    sentences = sent_tokenize(text)
+    if not sentences:
+        return [], np.zeros((0, engine.dimension), dtype=np.float32)
+
+    embeddings = engine.encode(sentences)
+    starts = chunk_starts(embeddings, similarity_threshold)
+    starts = cap_chunk_starts(starts, [estimate_tokens(s) for s in sentences], max_chunk_tokens)
+    ends = np.append(starts[1:], len(sentences))
+    chunks = [" ".join(sentences[s:e]) for s, e in zip(starts, ends)]
+
+    if chunk_embedding == "mean":
+        vectors = mean_chunk_vectors(embeddings, starts)
+    else:
+        vectors = engine.encode([c.replace("\n", " ") for c in chunks])
+
+    return [Document(page_content=chunk) for chunk in chunks], vectors
@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+from langchain.schema import Document
+from nltk.tokenize import sent_tokenize
+
+from lexical_index import exact_terms
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", 1200))
+# Sentences at least this similar to one already kept are dropped as near-duplicates
+DEDUP_THRESHOLD = float(os.getenv("RAG_DEDUP_THRESHOLD", 0.92))
+# Score bonus for a sentence that contains an exact term from the question (clause number, placeholder...)
+EXACT_TERM_BONUS = 0.5
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token count (about 4 characters per token), cheap enough to call per sentence."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def assemble_context(
+    docs,
+    question: str,
+    query_vector: np.ndarray,
+    engine,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    dedup_threshold: float = DEDUP_THRESHOLD,
+    stats: dict | None = None,
+) -> list[Document]:
+    """Trim retrieved chunks to the sentences worth sending to the model.
+
+    The chunks are split into sentences and embedded in one call. Sentences
+    are ranked by similarity to the question (plus a bonus for exact terms
+    the question mentions), near-duplicates of a better-ranked sentence are
+    dropped, and the best ones are kept until `budget` tokens are used. Kept
+    sentences stay in document order inside their original chunk.
+
+    Args:
+        docs (list[Document]): Retrieved chunks, best first.
+        question (str): The user question.
+        query_vector (np.ndarray): Embedding of the question.
+        engine: EmbeddingEngine used for the sentence embeddings.
+        budget (int): Maximum estimated tokens of context (0 disables trimming).
+        dedup_threshold (float): Cosine similarity above which a sentence counts as a duplicate.
+        stats (dict): Optional dict that receives token and sentence counts before and after.
+
+    Returns:
+        list[Document]: Trimmed chunks (with their original metadata), empty ones removed.
+    """
+    stats = stats if stats is not None else {}
+    stats["context_tokens_before"] = sum(estimate_tokens(doc.page_content) for doc in docs)
+
+    sentences, owners = [], []
+    for n, doc in enumerate(docs):
+        for sentence in sent_tokenize(doc.page_content):
+            sentences.append(sentence)
+            owners.append(n)
+    stats["sentences_before"] = len(sentences)
+    if not sentences:
+        stats.update(context_tokens_after=0, sentences_kept=0, duplicates_removed=0)
+        return []
+
+    vectors = engine.encode([s.replace("\n", " ") for s in sentences], normalize=True)
+    query = np.asarray(query_vector, dtype=np.float32)
+    scores = vectors @ (query / max(np.linalg.norm(query), 1e-12))
+    terms = set(exact_terms(question))
+    if terms:
+        scores = scores + EXACT_TERM_BONUS * np.array([bool(terms & set(exact_terms(s))) for s in sentences])
+
+    kept, used, duplicates = [], 0, 0
+    for i in np.argsort(-scores, kind="stable"):
+        if kept and float(np.max(vectors[kept] @ vectors[i])) >= dedup_threshold:
+            duplicates += 1
+            continue
+        cost = estimate_tokens(sentences[i])
+        # The best sentence is always kept so the model never gets an empty context
+        if budget > 0 and kept and used + cost > budget:
+            continue
+        kept.append(int(i))
+        used += cost
+
+    by_doc = {}
+    for i in sorted(kept):
+        by_doc.setdefault(owners[i], []).append(sentences[i])
+    trimmed = [
+        Document(page_content=" ".join(by_doc[n]), metadata=dict(docs[n].metadata)) for n in sorted(by_doc)
+    ]
+
+    stats.update(
+        context_tokens_after=sum(estimate_tokens(doc.page_content) for doc in trimmed),
+        sentences_kept=len(kept),
+        duplicates_removed=duplicates,
+    )
+    return trimmed
@@ -0,0 +1,326 @@
+import json
+import logging
+import math
+import os
+import threading
+
+import faiss
+import numpy as np
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS_DIR = os.getenv(
+    "RAG_CORPUS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "rag", "corpus_index"),
+)
+# Past this many chunks the flat index is rebuilt once as an ANN index.
+DEFAULT_ANN_THRESHOLD = int(os.getenv("RAG_CORPUS_ANN_THRESHOLD", 20000))
+# "ivf" supports real deletes; "hnsw" deletes through tombstones and periodic compaction.
+DEFAULT_ANN_KIND = os.getenv("RAG_CORPUS_ANN_KIND", "ivf")
+DEFAULT_NPROBE = int(os.getenv("RAG_CORPUS_NPROBE", 16))
+HNSW_M = 32
+# Rebuild an HNSW index once this share of its vectors are tombstones.
+HNSW_COMPACT_RATIO = 0.2
+
+INDEX_FILE = "index.faiss"
+STORE_FILE = "store.json"
+
+
+class CorpusIndex:
+    """Persistent multi-document vector index with incremental add/remove.
+
+    Vectors live in a FAISS index keyed by int64 chunk ids; chunk text and
+    metadata live in a JSON store next to it. Adding or removing a document
+    only touches that document's vectors. The index starts as exact
+    inner-product search and is rebuilt once as IVF or HNSW when it grows past
+    `ann_threshold` chunks. Filtered searches (doc_ids / where) are always
+    exact: an ANN index only probes part of the vectors, which can miss most
+    or all of a small allowed set.
+
+    Args:
+        root (str): Directory the index and store are saved in.
+        dim (int | None): Vector dimension; taken from the first add if None.
+        ann_threshold (int): Chunk count that triggers the switch to ANN search.
+        ann_kind (str): "ivf" or "hnsw".
+        autosave (bool): Save after every add/remove.
+    """
+
+    def __init__(
+        self,
+        root: str = DEFAULT_CORPUS_DIR,
+        dim: int | None = None,
+        ann_threshold: int = DEFAULT_ANN_THRESHOLD,
+        ann_kind: str = DEFAULT_ANN_KIND,
+        nprobe: int = DEFAULT_NPROBE,
+        autosave: bool = True,
+    ):
+        if ann_kind not in ("ivf", "hnsw"):
+            raise ValueError(f"ann_kind must be 'ivf' or 'hnsw', got {ann_kind!r}")
+        self.root = os.path.abspath(root)
+        self.dim = dim
+        self.ann_threshold = ann_threshold
+        self.ann_kind = ann_kind
+        self.nprobe = nprobe
+        self.autosave = autosave
+        self._lock = threading.RLock()
+
+        self.kind = "flat"
+        self.index = None
+        self.next_id = 0
+        self.chunks: dict[int, dict] = {}
+        self.docs: dict[str, dict] = {}
+        self.tombstones: set[int] = set()
+        self.load()
+
+    # --------------------------
+    # Persistence
+    # --------------------------
+    def load(self) -> None:
+        index_path = os.path.join(self.root, INDEX_FILE)
+        store_path = os.path.join(self.root, STORE_FILE)
+        if not (os.path.isfile(index_path) and os.path.isfile(store_path)):
+            return
+        with open(store_path, "r", encoding="utf-8") as f:
+            store = json.load(f)
+        self.index = faiss.read_index(index_path)
+        self.dim = store["dim"]
+        self.kind = store["kind"]
+        self.next_id = store["next_id"]
+        self.chunks = {int(k): v for k, v in store["chunks"].items()}
+        self.docs = store["docs"]
+        self.tombstones = set(store.get("tombstones", []))
+        if self.kind == "ivf":
+            self._ensure_direct_map()
+        logger.info(f"Loaded corpus index: {len(self.docs)} documents, {len(self.chunks)} chunks ({self.kind})")
+
+    def save(self) -> None:
+        if self.index is None:
+            return
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            index_tmp = os.path.join(self.root, INDEX_FILE + ".tmp")
+            store_tmp = os.path.join(self.root, STORE_FILE + ".tmp")
+            faiss.write_index(self.index, index_tmp)
+            with open(store_tmp, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "dim": self.dim,
+                        "kind": self.kind,
+                        "next_id": self.next_id,
+                        "chunks": self.chunks,
+                        "docs": self.docs,
+                        "tombstones": sorted(self.tombstones),
+                    },
+                    f,
+                )
+            os.replace(index_tmp, os.path.join(self.root, INDEX_FILE))
+            os.replace(store_tmp, os.path.join(self.root, STORE_FILE))
+
+    # --------------------------
+    # Index construction
+    # --------------------------
+    def _new_flat(self):
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(self.dim))
+
+    def _new_ann(self, vectors: np.ndarray):
+        if self.ann_kind == "hnsw":
+            return faiss.IndexIDMap2(faiss.IndexHNSWFlat(self.dim, HNSW_M, faiss.METRIC_INNER_PRODUCT))
+        nlist = max(1, int(4 * math.sqrt(len(vectors))))
+        quantizer = faiss.IndexFlatIP(self.dim)
+        index = faiss.IndexIVFFlat(quantizer, self.dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        # Lets filtered searches reconstruct vectors by id while keeping remove_ids
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return index
+
+    def _ensure_direct_map(self) -> None:
+        """Indexes saved before filtered searches reconstructed vectors have no id -> vector map."""
+        if self.index.direct_map.type != faiss.DirectMap.Hashtable:
+            self.index.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+    def _export(self):
+        """All live (ids, vectors) currently in an IDMap2-wrapped index."""
+        ids = faiss.vector_to_array(self.index.id_map).astype(np.int64)
+        vectors = self.index.index.reconstruct_n(0, self.index.ntotal)
+        if self.tombstones:
+            keep = ~np.isin(ids, np.fromiter(self.tombstones, dtype=np.int64))
+            ids, vectors = ids[keep], vectors[keep]
+        return ids, vectors
+
+    def _rebuild(self, kind: str) -> None:
+        ids, vectors = self._export()
+        self.index = self._new_ann(vectors) if kind != "flat" else self._new_flat()
+        self.index.add_with_ids(vectors, ids)
+        self.kind = kind
+        self.tombstones.clear()
+        logger.info(f"Rebuilt corpus index as {kind} with {len(ids)} vectors")
+
+    def _maybe_upgrade(self) -> None:
+        if self.kind == "flat" and len(self.chunks) >= self.ann_threshold:
+            self._rebuild(self.ann_kind)
+        elif self.kind == "hnsw" and self.tombstones:
+            if len(self.tombstones) >= HNSW_COMPACT_RATIO * self.index.ntotal:
+                self._rebuild("hnsw")
+
+    # --------------------------
+    # Documents
+    # --------------------------
+    def add_document(self, doc_id: str, chunks, vectors: np.ndarray, metadata: dict | None = None) -> int:
+        """Add a document's chunks. Replaces the document if `doc_id` already exists.
+
+        Args:
+            doc_id (str): Stable identifier for the document.
+            chunks (list[Document]): Chunks in document order.
+            vectors (np.ndarray): (n_chunks, dim) chunk vectors.
+            metadata (dict): Document-level metadata used for filtering.
+
+        Returns:
+            int: number of chunks indexed.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(chunks) != len(vectors):
+            raise ValueError(f"Got {len(chunks)} chunks but {len(vectors)} vectors.")
+        with self._lock:
+            if doc_id in self.docs:
+                self._remove(doc_id)
+            if self.index is None:
+                self.dim = self.dim or vectors.shape[1]
+                self.index = self._new_flat()
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Vector dimension {vectors.shape[1]} does not match index dimension {self.dim}.")
+
+            ids = np.arange(self.next_id, self.next_id + len(chunks), dtype=np.int64)
+            self.next_id += len(chunks)
+            if len(ids):
+                self.index.add_with_ids(vectors, ids)
+            for chunk_id, chunk in zip(ids.tolist(), chunks):
+                self.chunks[chunk_id] = {"doc_id": doc_id, "text": chunk.page_content, "metadata": chunk.metadata}
+            self.docs[doc_id] = {"chunk_ids": ids.tolist(), "metadata": metadata or {}}
+
+            self._maybe_upgrade()
+            if self.autosave:
+                self.save()
+        return len(ids)
+
+    replace_document = add_document
+
+    def _remove(self, doc_id: str) -> int:
+        doc = self.docs.pop(doc_id)
+        ids = np.array(doc["chunk_ids"], dtype=np.int64)
+        for chunk_id in doc["chunk_ids"]:
+            self.chunks.pop(chunk_id, None)
+        if len(ids):
+            if self.kind == "hnsw":
+                # HNSW graphs cannot drop nodes; hide them until the next compaction.
+                self.tombstones.update(ids.tolist())
+            else:
+                self.index.remove_ids(ids)
+        return len(ids)
+
+    def remove_document(self, doc_id: str) -> int:
+        """Remove a document's chunks. Returns the number removed (0 if unknown)."""
+        with self._lock:
+            if doc_id not in self.docs:
+                return 0
+            removed = self._remove(doc_id)
+            self._maybe_upgrade()
+            if self.autosave:
+                self.save()
+        return removed
+
+    def list_documents(self) -> dict:
+        return {doc_id: {"chunks": len(d["chunk_ids"]), "metadata": d["metadata"]} for doc_id, d in self.docs.items()}
+
+    # --------------------------
+    # Search
+    # --------------------------
+    def _allowed_ids(self, doc_ids=None, where: dict | None = None):
+        if doc_ids is None and not where:
+            return None
+        if doc_ids is not None:
+            candidates = [i for d in doc_ids if d in self.docs for i in self.docs[d]["chunk_ids"]]
+        else:
+            candidates = list(self.chunks)
+        if where:
+            candidates = [i for i in candidates if self._matches(i, where)]
+        return candidates
+
+    def _matches(self, chunk_id: int, where: dict) -> bool:
+        chunk = self.chunks[chunk_id]
+        fields = {**self.docs[chunk["doc_id"]]["metadata"], **chunk["metadata"], "doc_id": chunk["doc_id"]}
+        for key, expected in where.items():
+            value = fields.get(key)
+            if isinstance(expected, (list, tuple, set)):
+                if value not in expected:
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+    def _search_params(self, allowed):
+        sel = None
+        if allowed is not None:
+            sel = faiss.IDSelectorBatch(np.array(allowed, dtype=np.int64))
+        elif self.tombstones:
+            sel = faiss.IDSelectorNot(faiss.IDSelectorBatch(np.fromiter(self.tombstones, dtype=np.int64)))
+        if self.kind == "ivf":
+            return faiss.SearchParametersIVF(sel=sel, nprobe=self.nprobe)
+        if sel is None:
+            return None
+        return faiss.SearchParameters(sel=sel)
+
+    def _exact_search(self, query: np.ndarray, k: int, allowed):
+        """Brute-force inner product over the allowed chunks, shaped like index.search output."""
+        ids = np.array(allowed, dtype=np.int64)
+        vectors = self.index.reconstruct_batch(ids)
+        scores = vectors @ query[0]
+        top = np.argsort(-scores, kind="stable")[:k]
+        return scores[top].reshape(1, -1), ids[top].reshape(1, -1)
+
+    def search(self, vector: np.ndarray, k: int = 5, doc_ids=None, where: dict | None = None):
+        """Nearest chunks to a query vector, optionally restricted to documents or metadata.
+
+        Args:
+            vector (np.ndarray): (dim,) query vector.
+            k (int): Number of chunks to return.
+            doc_ids (list[str] | None): Only search these documents.
+            where (dict | None): Metadata equality filter; list values mean "any of".
+
+        Returns:
+            list[tuple[Document, float]]: chunks (with doc_id/chunk_id metadata) and scores.
+        """
+        with self._lock:
+            if self.index is None or not self.chunks:
+                return []
+            allowed = self._allowed_ids(doc_ids, where)
+            if allowed is not None:
+                if self.tombstones:
+                    allowed = [i for i in allowed if i not in self.tombstones]
+                if not allowed:
+                    return []
+            query = np.ascontiguousarray(np.asarray(vector, dtype=np.float32).reshape(1, -1))
+            if allowed is not None and self.kind != "flat":
+                scores, ids = self._exact_search(query, k, allowed)
+            else:
+                params = self._search_params(allowed)
+                if params is None:
+                    scores, ids = self.index.search(query, k)
+                else:
+                    scores, ids = self.index.search(query, k, params=params)
+
+            results = []
+            for score, chunk_id in zip(scores[0].tolist(), ids[0].tolist()):
+                chunk = self.chunks.get(chunk_id)
+                if chunk_id < 0 or chunk is None:
+                    continue
+                metadata = {**chunk["metadata"], "doc_id": chunk["doc_id"], "chunk_id": chunk_id}
+                results.append((Document(page_content=chunk["text"], metadata=metadata), score))
+            return results
+
+    def import_langchain_faiss(self, db, doc_id: str, metadata: dict | None = None) -> int:
+        """Add every chunk of a LangChain FAISS store (e.g. rag/faiss_index_google) as one document."""
+        n = db.index.ntotal
+        vectors = db.index.reconstruct_n(0, n)
+        chunks = [db.docstore.search(db.index_to_docstore_id[i]) for i in range(n)]
+        return self.add_document(doc_id, chunks, vectors, metadata)
@@ -0,0 +1,107 @@
+import glob
+import hashlib
+import mmap
+import os
+import shutil
+import threading
+from tempfile import NamedTemporaryFile
+
+from index_cache import copy_and_hash
+
+DEFAULT_STORE_DIR = os.getenv(
+    "RAG_DOCUMENT_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "rag", "documents"),
+)
+HANDLE_PREFIX = "doc-"
+HANDLE_HEX = 16
+
+
+def file_digest(path: str) -> str:
+    """sha256 of a file, hashed straight from a memory map of it (empty files included)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256(b"").hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.sha256(mm).hexdigest()
+
+
+class DocumentStore:
+    """Content-addressed store of uploaded documents, addressed by short handles.
+
+    A document is registered once (from a local path, raw bytes or a file
+    object) and copied to `<root>/<sha256>.pdf`. The returned handle,
+    "doc-" plus the first 16 hex digits of the hash, is all later tool calls
+    need to pass, so request size no longer depends on document size. The
+    full digest doubles as the document part of the index cache key.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        # (path, size, mtime) -> digest, so re-registering an unchanged local file skips hashing
+        self._seen: dict[tuple, str] = {}
+
+    @staticmethod
+    def handle_for(digest: str) -> str:
+        return HANDLE_PREFIX + digest[:HANDLE_HEX]
+
+    def _stored_path(self, digest: str) -> str:
+        return os.path.join(self.root, f"{digest}.pdf")
+
+    def put_path(self, path: str) -> str:
+        """Register a local file and return its handle."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        signature = (path, st.st_size, st.st_mtime_ns)
+        digest = self._seen.get(signature)
+        if digest is None:
+            digest = file_digest(path)
+            self._seen[signature] = digest
+        target = self._stored_path(digest)
+        if not os.path.isfile(target):
+            tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, target)
+        return self.handle_for(digest)
+
+    def put_bytes(self, data: bytes) -> str:
+        """Register raw document bytes and return the handle."""
+        digest = hashlib.sha256(data).hexdigest()
+        target = self._stored_path(digest)
+        if not os.path.isfile(target):
+            with NamedTemporaryFile(dir=self.root, suffix=".tmp", delete=False) as tmp:
+                tmp.write(data)
+            os.replace(tmp.name, target)
+        return self.handle_for(digest)
+
+    def put_fileobj(self, fileobj) -> str:
+        """Register a binary file object (read in blocks) and return the handle."""
+        with NamedTemporaryFile(dir=self.root, suffix=".tmp", delete=False) as tmp:
+            digest = copy_and_hash(fileobj, tmp)
+        target = self._stored_path(digest)
+        if os.path.isfile(target):
+            os.remove(tmp.name)
+        else:
+            os.replace(tmp.name, target)
+        return self.handle_for(digest)
+
+    def lookup(self, handle: str) -> tuple[str, str]:
+        """(stored path, full sha256) for a handle. Raises KeyError if unknown."""
+        if not handle.startswith(HANDLE_PREFIX):
+            raise KeyError(handle)
+        prefix = handle[len(HANDLE_PREFIX):]
+        matches = glob.glob(os.path.join(self.root, f"{glob.escape(prefix)}*.pdf"))
+        if len(matches) != 1:
+            raise KeyError(handle)
+        path = matches[0]
+        return path, os.path.basename(path)[:-len(".pdf")]
+
+    def resolve(self, document) -> tuple[str, str]:
+        """Accept a handle, a local path or a file object; return (stored path, sha256)."""
+        if hasattr(document, "read"):
+            return self.lookup(self.put_fileobj(document))
+        if isinstance(document, str) and document.startswith(HANDLE_PREFIX):
+            return self.lookup(document)
+        if isinstance(document, str) and os.path.isfile(document):
+            return self.lookup(self.put_path(document))
+        raise KeyError(f"Unknown document {document!r}: register it with register_document first.")
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = os.getenv("EMBEDDING_MODEL", "multi-qa-mpnet-base-dot-v1")
+# "fake" swaps the model for a hashing encoder (offline benchmarks)
+DEFAULT_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+DEFAULT_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", 64))
+DEFAULT_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", 5))
+
+
+class EmbeddingEngine:
+    """Process-wide sentence embedding engine with dynamic micro-batching.
+
+    The model is loaded once, on first use. Callers on any thread submit texts
+    through `encode`; a single worker thread drains the queue, merging requests
+    until either `max_batch` texts are pending or `max_wait_ms` has passed since
+    the first one arrived, and runs them through the model in one call.
+
+    Args:
+        model_name (str): SentenceTransformer model to load.
+        max_batch (int): Upper bound on texts merged into one model call.
+        max_wait_ms (float): How long the first request in a batch may wait for company.
+        backend (str): "sentence-transformers", or "fake" for the offline hashing encoder.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        backend: str = DEFAULT_BACKEND,
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self.batches = 0
+        self.texts_encoded = 0
+
+    @property
+    def model(self) -> SentenceTransformer:
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    if self.backend == "fake":
+                        from fakes import HashingSentenceEncoder
+
+                        logger.info("Using the fake hashing encoder instead of an embedding model")
+                        self._model = HashingSentenceEncoder()
+                    else:
+                        logger.info(f"Loading embedding model {self.model_name}")
+                        self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _submit(self, batch: list) -> Future:
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((batch, future))
+        return future
+
+    def _finish(self, vectors: np.ndarray, single: bool, normalize: bool) -> np.ndarray:
+        if normalize:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.clip(norms, 1e-12, None)
+        return vectors[0] if single else vectors
+
+    def encode(self, texts, normalize: bool = False) -> np.ndarray:
+        """Embed one string or a list of strings, blocking until the batch runs.
+
+        Returns:
+            np.ndarray: (n, dim) float32 array, or (dim,) for a single string.
+        """
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        if not batch:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return self._finish(self._submit(batch).result(), single, normalize)
+
+    async def aencode(self, texts, normalize: bool = False) -> np.ndarray:
+        """`encode` for coroutines; awaits the batch without blocking the event loop."""
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        if not batch:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return self._finish(await asyncio.wrap_future(self._submit(batch)), single, normalize)
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "queued_requests": self._queue.qsize(),
+            "batches": self.batches,
+            "texts_encoded": self.texts_encoded,
+            "avg_batch": self.texts_encoded / self.batches if self.batches else 0.0,
+        }
+
+    def _run(self) -> None:
+        while True:
+            pending = [self._queue.get()]
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[0])
+            self._encode_batch(pending)
+
+    def _encode_batch(self, pending) -> None:
+        texts = [t for batch, _ in pending for t in batch]
+        try:
+            vectors = self.model.encode(
+                texts,
+                batch_size=self.max_batch,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            ).astype(np.float32, copy=False)
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.texts_encoded += len(texts)
+        start = 0
+        for batch, future in pending:
+            future.set_result(vectors[start:start + len(batch)])
+            start += len(batch)
+
+
+class SharedEmbeddings(Embeddings):
+    """LangChain `Embeddings` backed by the shared engine.
+
+    Drop-in replacement for `HuggingFaceEmbeddings(model_name=...)` that does
+    not load its own copy of the model.
+    """
+
+    def __init__(self, engine: "EmbeddingEngine | None" = None):
+        self.engine = engine or get_engine()
+
+    def embed_documents(self, texts):
+        texts = [t.replace("\n", " ") for t in texts]
+        return self.engine.encode(texts).tolist()
+
+    def embed_query(self, text):
+        return self.engine.encode(text.replace("\n", " ")).tolist()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> EmbeddingEngine:
+    """Return the process-wide embedding engine, creating it on first call."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = EmbeddingEngine()
+    return _engine
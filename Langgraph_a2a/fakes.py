@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import os
+import re
+import time
+from uuid import uuid4
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Deterministic local stand-ins for Gemini and the embedding model, selected with
+# LLM_BACKEND=fake / EMBEDDING_BACKEND=fake to run the agent chain offline.
+FAKE_LLM_LATENCY = float(os.getenv("LLM_FAKE_LATENCY", 0.05))
+FAKE_EMBEDDING_LATENCY = float(os.getenv("EMBEDDING_FAKE_LATENCY", 0.0005))
+FAKE_EMBEDDING_DIM = int(os.getenv("EMBEDDING_FAKE_DIM", 768))
+
+_PDF_PATH = re.compile(r"(?:[\w./\\-]+)\.pdf|doc-[0-9a-f]{16}")
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_DAYS = re.compile(r"(\d+)\s+days?")
+_JURISDICTIONS = ("California", "New York", "Texas")
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(part if isinstance(part, str) else str(part.get("text", "")) for part in content)
+
+
+class FakeToolCallingChatModel(BaseChatModel):
+    """Scripted chat model for the LangGraph tool loop.
+
+    For a user message it calls at most one bound tool, picked by simple
+    rules: date arithmetic for "<n> days ... YYYY-MM-DD", rag_query when a
+    PDF path or doc handle is mentioned, jurisdiction_checker when a
+    supported state is named. After a tool result, or when no rule matches,
+    it answers in text. Every call takes `latency` seconds.
+    """
+
+    model: str = "fake-gemini"
+    latency: float = FAKE_LLM_LATENCY
+    tool_names: list[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-calling"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"tool_names": [getattr(t, "name", str(t)) for t in tools]})
+
+    def _respond(self, messages) -> AIMessage:
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=f"Based on {last.name}: {_text(last.content)[:300]}")
+        query = _text(last.content) if isinstance(last, HumanMessage) else _text(getattr(last, "content", ""))
+
+        call = None
+        date, days = _DATE.search(query), _DAYS.search(query)
+        document = _PDF_PATH.search(query)
+        jurisdiction = next((j for j in _JURISDICTIONS if j.lower() in query.lower()), None)
+        if date and days:
+            call = ("add_days_to_date", {"input_date": date.group(0), "duration_days": days.group(1)})
+        elif document:
+            call = ("rag_query", {"document": document.group(0), "question": query})
+        elif jurisdiction:
+            call = ("jurisdiction_checker", {"jurisdiction": jurisdiction})
+
+        if call is None or call[0] not in self.tool_names:
+            digest = hashlib.sha256(query.encode("utf-8")).hexdigest()[:12]
+            return AIMessage(content=f"[fake answer {digest}] {query[:200]}")
+        return AIMessage(content="", tool_calls=[{"name": call[0], "args": call[1], "id": uuid4().hex}])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+
+class HashingSentenceEncoder:
+    """Drop-in for the SentenceTransformer calls the embedding engine makes.
+
+    Texts are embedded as hashed bag-of-words vectors, so similar texts get
+    similar vectors and results are reproducible. Each encode call costs
+    `latency` seconds per text to mimic model time.
+    """
+
+    def __init__(self, dimension: int = FAKE_EMBEDDING_DIM, latency: float = FAKE_EMBEDDING_LATENCY):
+        self.dimension = dimension
+        self.latency = latency
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True, show_progress_bar: bool = False, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        time.sleep(self.latency * len(texts))
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+                vectors[i, h % self.dimension] += 1.0 if (h >> 32) & 1 else -1.0
+        return vectors[0] if single else vectors
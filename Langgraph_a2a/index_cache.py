@@ -0,0 +1,197 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from uuid import uuid4
+
+from langchain.schema import Document
+from langchain.vectorstores import FAISS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "RAG_INDEX_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "rag", "index_cache"),
+)
+DEFAULT_MAX_BYTES = int(os.getenv("RAG_INDEX_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+# Bump when the on-disk layout changes so stale entries are never loaded.
+CACHE_FORMAT_VERSION = 2
+
+META_FILE = "meta.json"
+CHUNKS_FILE = "chunks.json"
+
+
+def cache_key_for_digest(content_digest: str, settings: dict) -> str:
+    """Content-addressed key for a document, given its sha256, and the settings used to index it.
+
+    Args:
+        content_digest (str): hex sha256 of the document's bytes.
+        settings (dict): Chunker and embedding settings (model name, threshold...).
+
+    Returns:
+        str: hex sha256 digest.
+    """
+    h = hashlib.sha256()
+    h.update(content_digest.encode("ascii"))
+    h.update(json.dumps({"version": CACHE_FORMAT_VERSION, **settings}, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def copy_and_hash(src, dst, block_size: int = 1024 * 1024) -> str:
+    """Copy a binary file object to `dst` in blocks and return the sha256 of the content."""
+    h = hashlib.sha256()
+    while True:
+        block = src.read(block_size)
+        if not block:
+            break
+        h.update(block)
+        dst.write(block)
+    return h.hexdigest()
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class IndexCache:
+    """On-disk cache of chunked + embedded documents with size-based LRU eviction.
+
+    Each entry is a directory named after its key holding the files written by
+    `FAISS.save_local` (index.faiss / index.pkl, same layout as
+    rag/faiss_index_google), the chunks as JSON, and a small meta.json used for
+    LRU bookkeeping.
+    """
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def artifact_path(self, key: str, name: str) -> str:
+        """Path of an extra file stored with an entry (see `put(artifacts=...)`)."""
+        return os.path.join(self._entry_path(key), name)
+
+    def _touch(self, path: str) -> None:
+        meta_path = os.path.join(path, META_FILE)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        meta["last_used"] = time.time()
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def get(self, key: str, embeddings):
+        """Load a cached FAISS index, or return None on a miss.
+
+        Args:
+            key (str): Key from `cache_key_for_digest`.
+            embeddings: LangChain embeddings object used for query embedding.
+
+        Returns:
+            FAISS | None: the loaded vector store.
+        """
+        path = self._entry_path(key)
+        if not os.path.isfile(os.path.join(path, "index.faiss")):
+            return None
+        try:
+            db = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+        except Exception as e:
+            logger.warning(f"Dropping unreadable index cache entry {key}: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        with self._lock:
+            self._touch(path)
+        return db
+
+    def get_chunks(self, key: str):
+        """Return the cached chunks for a key as Documents, or None on a miss."""
+        try:
+            with open(os.path.join(self._entry_path(key), CHUNKS_FILE), "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return [Document(page_content=c["page_content"], metadata=c.get("metadata", {})) for c in raw]
+
+    def put(self, key: str, db, chunks, settings: dict | None = None, artifacts: dict | None = None) -> None:
+        """Persist an index and its chunks under `key`, then enforce the size limit.
+
+        `artifacts` maps file names to objects with a `save(path)` method (e.g. the
+        lexical index) that are stored in the same entry.
+
+        The entry is written to a temporary directory and renamed into place so
+        readers never observe a half-written index.
+        """
+        final_path = self._entry_path(key)
+        tmp_path = os.path.join(self.root, f".tmp-{key}-{uuid4().hex}")
+        try:
+            db.save_local(tmp_path)
+            with open(os.path.join(tmp_path, CHUNKS_FILE), "w", encoding="utf-8") as f:
+                json.dump(
+                    [{"page_content": c.page_content, "metadata": c.metadata} for c in chunks],
+                    f,
+                )
+            for name, artifact in (artifacts or {}).items():
+                artifact.save(os.path.join(tmp_path, name))
+            with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+                json.dump(
+                    {"created": time.time(), "last_used": time.time(), "settings": settings or {}},
+                    f,
+                )
+            with self._lock:
+                if os.path.isdir(final_path):
+                    # Another request indexed the same document first.
+                    shutil.rmtree(tmp_path, ignore_errors=True)
+                else:
+                    os.replace(tmp_path, final_path)
+                self._evict(keep=key)
+        except Exception as e:
+            logger.warning(f"Could not write index cache entry {key}: {e}")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def _evict(self, keep: str | None = None) -> None:
+        entries = []
+        total = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".tmp-") or not os.path.isdir(path):
+                continue
+            if name == keep:
+                total += _dir_size(path)
+                continue
+            try:
+                with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+                    last_used = json.load(f).get("last_used", 0)
+            except (OSError, ValueError):
+                last_used = 0
+            size = _dir_size(path)
+            total += size
+            entries.append((last_used, size, path))
+
+        entries.sort()
+        while total > self.max_bytes and entries:
+            _, size, path = entries.pop(0)
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            logger.info(f"Evicted index cache entry {os.path.basename(path)} ({size} bytes)")
+
+    def clear(self) -> None:
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+            os.makedirs(self.root, exist_ok=True)
@@ -0,0 +1,201 @@
+import logging
+import queue
+import threading
+
+import numpy as np
+from langchain.document_loaders import PyPDFLoader
+from langchain.schema import Document
+from nltk.tokenize import sent_tokenize
+
+from chunking import MAX_CHUNK_TOKENS, SIMILARITY_THRESHOLD, CHUNK_EMBEDDING_MODES
+from context_budget import estimate_tokens
+from embedding_service import get_engine
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 8
+EMBED_BATCH = 64
+
+# A page whose text ends with one of these closes its last sentence;
+# anything else is carried over and finished on the next page.
+_SENTENCE_END = (".", "!", "?", ":", ";", '"', "'", ")", "]")
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def threaded(gen, maxsize: int = QUEUE_SIZE):
+    """Run a generator in its own thread, handing items over through a bounded queue.
+
+    The producer blocks when `maxsize` items are waiting, so a slow stage
+    applies backpressure to the ones before it instead of buffering the whole
+    document. Exceptions are re-raised in the consumer.
+    """
+    q: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run():
+        try:
+            for item in gen:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failed(e))
+        finally:
+            put(_DONE)
+
+    threading.Thread(target=run, daemon=True).start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failed):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+
+
+def iter_pages(pdf_path: str):
+    """Yield the PDF one page at a time (metadata carries the 0-based `page`)."""
+    loader = PyPDFLoader(pdf_path)
+    yield from loader.lazy_load()
+
+
+def iter_sentences(pages):
+    """Split pages into (sentence, page) pairs.
+
+    A sentence that runs over a page break is carried into the next page's text
+    so it is tokenized whole; it keeps the page it started on.
+    """
+    carry, carry_page = "", None
+    for page in pages:
+        page_no = page.metadata.get("page", 0)
+        text = page.page_content.strip()
+        if not text:
+            continue
+        start_page = carry_page if carry else page_no
+        sentences = sent_tokenize(f"{carry} {text}" if carry else text)
+        carry, carry_page = "", None
+        if sentences and not text.endswith(_SENTENCE_END):
+            carry, carry_page = sentences.pop(), (start_page if len(sentences) == 0 else page_no)
+        for i, sentence in enumerate(sentences):
+            yield sentence, (start_page if i == 0 else page_no)
+    if carry:
+        yield carry, carry_page
+
+
+def iter_embedded(sentences, engine=None, batch_size: int = EMBED_BATCH):
+    """Group (sentence, page) pairs into batches and embed each batch.
+
+    Yields:
+        tuple[list[str], list[int], np.ndarray]: sentences, pages and vectors.
+    """
+    engine = engine or get_engine()
+    texts, pages = [], []
+    for sentence, page in sentences:
+        texts.append(sentence)
+        pages.append(page)
+        if len(texts) >= batch_size:
+            yield texts, pages, engine.encode(texts)
+            texts, pages = [], []
+    if texts:
+        yield texts, pages, engine.encode(texts)
+
+
+def iter_chunks(
+    batches,
+    similarity_threshold: float = SIMILARITY_THRESHOLD,
+    chunk_embedding: str = "mean",
+    engine=None,
+    max_chunk_tokens: int = MAX_CHUNK_TOKENS,
+):
+    """Merge embedded sentence batches into semantic chunks.
+
+    Boundaries are found per batch with array ops; the open chunk and the last
+    sentence vector are carried between batches so chunks merge across batch
+    (and page) boundaries exactly as the whole-document chunker would. A chunk
+    is also closed before it would exceed `max_chunk_tokens`.
+
+    Yields:
+        tuple[Document, np.ndarray]: chunk with `page` / `page_end` metadata, and its vector.
+    """
+    if chunk_embedding not in CHUNK_EMBEDDING_MODES:
+        raise ValueError(f"chunk_embedding must be one of {CHUNK_EMBEDDING_MODES}, got {chunk_embedding!r}")
+    engine = engine or get_engine()
+
+    current, current_pages, current_sum = [], [], None
+    current_tokens = 0
+    prev = None
+
+    def emit():
+        text = " ".join(current)
+        if chunk_embedding == "mean":
+            vector = current_sum / len(current)
+        else:
+            vector = engine.encode(text.replace("\n", " "))
+        doc = Document(page_content=text, metadata={"page": current_pages[0], "page_end": current_pages[-1]})
+        return doc, vector
+
+    for texts, pages, vectors in batches:
+        normed = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        if prev is None:
+            linked = np.concatenate(([False], np.einsum("ij,ij->i", normed[:-1], normed[1:]) > similarity_threshold))
+        else:
+            stacked = np.vstack((prev[None, :], normed))
+            linked = np.einsum("ij,ij->i", stacked[:-1], stacked[1:]) > similarity_threshold
+
+        for i in range(len(texts)):
+            tokens = estimate_tokens(texts[i])
+            too_long = max_chunk_tokens > 0 and current_tokens + tokens > max_chunk_tokens
+            if current and (not linked[i] or too_long):
+                yield emit()
+                current, current_pages, current_sum = [], [], None
+                current_tokens = 0
+            current_tokens += tokens
+            current.append(texts[i])
+            current_pages.append(pages[i])
+            current_sum = vectors[i].copy() if current_sum is None else current_sum + vectors[i]
+        prev = normed[-1]
+
+    if current:
+        yield emit()
+
+
+def stream_pdf_chunks(
+    pdf_path: str,
+    similarity_threshold: float = SIMILARITY_THRESHOLD,
+    chunk_embedding: str = "mean",
+    engine=None,
+    queue_size: int = QUEUE_SIZE,
+    batch_size: int = EMBED_BATCH,
+    max_chunk_tokens: int = MAX_CHUNK_TOKENS,
+):
+    """Parse -> sentence-split -> embed -> chunk pipeline over a PDF on disk.
+
+    Each stage runs in its own thread connected by bounded queues, so parsing
+    of later pages overlaps with embedding of earlier ones and memory stays
+    proportional to `queue_size` rather than to the document.
+
+    Yields:
+        tuple[Document, np.ndarray]: chunks in document order with their vectors.
+    """
+    engine = engine or get_engine()
+    pages = threaded(iter_pages(pdf_path), queue_size)
+    sentences = threaded(iter_sentences(pages), queue_size * batch_size)
+    embedded = threaded(iter_embedded(sentences, engine, batch_size), queue_size)
+    yield from iter_chunks(embedded, similarity_threshold, chunk_embedding, engine, max_chunk_tokens)
@@ -1,6 +1,8 @@
 
+import asyncio
 import logging
-from uuid import uuid4
+import os
+import time
 
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
@@ -10,23 +12,80 @@ from a2a.types import (
     InvalidParamsError,
     Part,
     TaskState,
+    TaskNotCancelableError,
+    TaskStatusUpdateEvent,
     TextPart,
-    UnsupportedOperationError,
 )
 from a2a.utils import new_task, new_agent_text_message
 from a2a.utils.errors import ServerError
-from langgraph_agent import graph as LegalAssistantAgent  
+from langgraph_agent import get_graph
+from tracing import record_span, span
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("A2A_MAX_CONCURRENCY", 4))
+DEFAULT_MAX_QUEUE = int(os.getenv("A2A_MAX_QUEUE", 16))
+# How long a cancel for a task running in another worker waits for that worker to stop it
+DEFAULT_CANCEL_TIMEOUT = float(os.getenv("A2A_CANCEL_TIMEOUT", 30))
+
+
+def message_text(content) -> str:
+    """Text of a LangChain message content, which may be a string or a list of parts."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(message_text(part) for part in content)
+    if isinstance(content, dict):
+        for key in ["text", "content", "message"]:
+            if key in content and isinstance(content[key], str):
+                return content[key]
+    return ""
+
+
+def final_answer(state) -> str:
+    """Content of the last assistant message in a graph state, or "" if there is none."""
+    if not isinstance(state, dict):
+        return ""
+    for message in reversed(state.get("messages", [])):
+        if getattr(message, "type", None) == "ai" and not getattr(message, "tool_calls", None):
+            return message_text(message.content)
+    return ""
+
 
 class LegalAssistantExecutor(AgentExecutor):
-    """A2A Executor wrapper for your LangGraph Legal Assistant."""
+    """A2A Executor wrapper for your LangGraph Legal Assistant.
+
+    At most `max_concurrency` graph runs execute at once. Up to `max_queue`
+    further requests wait in the "submitted" state; anything beyond that is
+    rejected straight away. Running and queued tasks can be cancelled.
+
+    Requests sharing an A2A context_id continue the same checkpointed
+    conversation (the context_id is the graph's thread_id).
+
+    With a shared `task_store` (SqliteTaskStore), a cancel for a task run by
+    another worker is recorded in the store; the owning worker's
+    `task_store.watch(executor.cancel_running)` loop then stops it.
+    """
 
-    def __init__(self):
-        agent_instance = LegalAssistantAgent  
-        self.agent = agent_instance  
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        task_store=None,
+        cancel_timeout: float = DEFAULT_CANCEL_TIMEOUT,
+    ):
+        self.agent = None  # checkpointed graph, opened on first request
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.task_store = task_store
+        self.cancel_timeout = cancel_timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._admitted = 0  # running + queued
+        self._running: dict[str, asyncio.Task] = {}
+        self._updaters: dict[str, TaskUpdater] = {}
+        self._cancelled: set[str] = set()
+        self._draining = False
 
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
         # Validate the request
@@ -48,42 +107,165 @@ class LegalAssistantExecutor(AgentExecutor):
             await event_queue.enqueue_event(task)
 
         updater = TaskUpdater(event_queue, task.id, task.context_id)
-        def extract_text(content):
-            if isinstance(content, str):
-                return content
-            elif isinstance(content, dict):
-               
-                for key in ["text", "content", "message"]:
-                    if key in content and isinstance(content[key], str):
-                        return content[key]
-                
-                return str(content)
-            else:
-                return str(content)
 
+        if self._draining or self._admitted >= self.max_concurrency + self.max_queue:
+            reason = "shutting down" if self._draining else "busy"
+            logger.warning(f"Rejecting task {task.id}: {reason} ({self._admitted} running or queued)")
+            await updater.update_status(
+                TaskState.rejected,
+                new_agent_text_message(f"The legal assistant is {reason}, please retry shortly.", task.context_id, task.id),
+                final=True,
+            )
+            return
+
+        self._admitted += 1
+        run = asyncio.create_task(self._run(query_dict, task, updater))
+        self._running[task.id] = run
+        self._updaters[task.id] = updater
         try:
+            with span("a2a", task_id=task.id):
+                await run
+        except asyncio.CancelledError:
+            if task.id not in self._cancelled:
+                raise
+            logger.info(f"Task {task.id} cancelled")
+        finally:
+            if not run.done():
+                run.cancel()
+            self._running.pop(task.id, None)
+            self._updaters.pop(task.id, None)
+            self._cancelled.discard(task.id)
+            self._admitted -= 1
+
+    async def _run(self, query_dict: dict, task, updater: TaskUpdater) -> None:
+        if self._slots.locked():
+            queued = max(self._admitted - self.max_concurrency, 1)
+            await updater.update_status(
+                TaskState.submitted,
+                new_agent_text_message(f"Queued, {queued} request(s) waiting for a free slot...", task.context_id, task.id),
+            )
+        await self._slots.acquire()
+
+        try:
+            await updater.update_status(
+                TaskState.working,
+                new_agent_text_message("Working on your request...", task.context_id, task.id),
+            )
 
-            
-            result = await self.agent.ainvoke(query_dict)
-            
-            item = {
-                "content": result,
-                "is_task_complete": True,
-                "require_user_input": False,
-            }
+            if self.agent is None:
+                self.agent = await get_graph()
+            config = {"configurable": {"thread_id": task.context_id}}
+
+            final_state = None
+            turn_text = ""
+            # Tokens are appended to the answer artifact rather than sent as status messages,
+            # which the task manager would keep in task.history one entry per token
+            answer_id = f"{task.id}-answer"
+            graph_start = time.perf_counter()
+            async for event in self.agent.astream_events(query_dict, config=config, version="v2"):
+                kind = event["event"]
+
+                # Only the answering model streams to the user, not e.g. the history summarizer
+                if kind.startswith("on_chat_model") and event.get("metadata", {}).get("langgraph_node") != "call_model":
+                    continue
+
+                if kind == "on_chat_model_start":
+                    turn_text = ""
+
+                elif kind == "on_chat_model_stream":
+                    token = message_text(event["data"]["chunk"].content)
+                    if token:
+                        # A new model turn starts the artifact over
+                        await updater.add_artifact(
+                            [Part(root=TextPart(text=token))],
+                            artifact_id=answer_id,
+                            name="legal_response",
+                            append=bool(turn_text),
+                            last_chunk=False,
+                        )
+                        turn_text += token
+
+                elif kind == "on_tool_start":
+                    await updater.update_status(
+                        TaskState.working,
+                        new_agent_text_message(f"Calling tool {event['name']}...", task.context_id, task.id),
+                    )
+
+                elif kind == "on_tool_end":
+                    await updater.update_status(
+                        TaskState.working,
+                        new_agent_text_message(f"Tool {event['name']} finished.", task.context_id, task.id),
+                    )
+
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    # End of the root graph run: its output is the final state
+                    final_state = event["data"].get("output")
+
+            record_span("langgraph", (time.perf_counter() - graph_start) * 1000, task_id=task.id)
+
+            answer = final_answer(final_state) or turn_text
+            # Replaces the streamed chunks with the whole answer in one part
             await updater.add_artifact(
-                [Part(root=TextPart(text=extract_text(item["content"])))],
+                [Part(root=TextPart(text=answer))],
+                artifact_id=answer_id,
                 name="legal_response",
+                last_chunk=True,
             )
             await updater.complete()
 
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Error while streaming response: {e}", exc_info=True)
             raise ServerError(error=InternalError()) from e
+        finally:
+            self._slots.release()
+
+    async def drain(self, timeout: float) -> None:
+        """Stop admitting tasks and wait up to `timeout` seconds for the admitted ones to finish."""
+        self._draining = True
+        running = [run for run in self._running.values() if not run.done()]
+        if running:
+            logger.info(f"Draining {len(running)} task(s)...")
+            _, pending = await asyncio.wait(running, timeout=timeout)
+            if pending:
+                logger.warning(f"{len(pending)} task(s) still running after {timeout:g}s, shutting down anyway")
 
     def _validate_request(self, context: RequestContext) -> bool:
       
         return False
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
-        raise ServerError(error=UnsupportedOperationError())
+        """Stop the task's graph run (and its pending tool calls) and mark it canceled.
+
+        A task running in another worker is flagged in the shared task store
+        and this waits up to `cancel_timeout` seconds for its owner to stop it.
+        """
+        if await self.cancel_running(context.task_id):
+            return
+        if self.task_store is None or not await self.task_store.request_cancel(context.task_id):
+            raise ServerError(error=TaskNotCancelableError())
+
+        task = await self.task_store.wait_finished(context.task_id, self.cancel_timeout)
+        if task is None:
+            # Also stops the queue manager from following the task for this request
+            await event_queue.close()
+            raise ServerError(error=TaskNotCancelableError(message="The worker running the task did not stop it in time."))
+        await event_queue.enqueue_event(
+            TaskStatusUpdateEvent(task_id=task.id, context_id=task.context_id, status=task.status, final=True)
+        )
+
+    async def cancel_running(self, task_id: str) -> bool:
+        """Cancel a task running in this process; False if it is not running here."""
+        run = self._running.get(task_id)
+        if run is None or run.done():
+            return False
+
+        self._cancelled.add(task_id)
+        # Cancelling the asyncio task unwinds astream_events, which cancels the in-flight model/MCP awaits
+        run.cancel()
+        updater = self._updaters[task_id]
+        await updater.cancel(
+            new_agent_text_message("Request cancelled.", updater.context_id, task_id)
+        )
+        return True
@@ -1,42 +1,155 @@
-from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain.chat_models import init_chat_model
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.prebuilt import ToolNode
+from langgraph.checkpoint.memory import MemorySaver
 from dotenv import load_dotenv
+import asyncio
+import logging
 import os
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+from mcp_pool import MCPToolPool
+from llm_gateway import get_gateway, request_key
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+logger = logging.getLogger(__name__)
 
+# Conversations are checkpointed per A2A context_id (the graph's thread_id)
+CHECKPOINT_DB = os.getenv(
+    "LANGGRAPH_CHECKPOINT_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "state", "langgraph_checkpoints.sqlite"),
+)
+# Once the history passes this many (estimated) tokens, everything before the
+# last HISTORY_KEEP_TURNS user turns is folded into a running summary
+HISTORY_TOKEN_BUDGET = int(os.getenv("LANGGRAPH_HISTORY_TOKEN_BUDGET", 6000))
+HISTORY_KEEP_TURNS = max(1, int(os.getenv("LANGGRAPH_HISTORY_KEEP_TURNS", 2)))
+# Tool results longer than this are shortened once the model has read them
+TOOL_RESULT_MAX_CHARS = int(os.getenv("LANGGRAPH_TOOL_RESULT_MAX_CHARS", 1500))
 
 
-model =  ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash" 
-)
 
+# Retries and rate limiting are done by the shared gateway, not per client.
+if os.getenv("LLM_BACKEND") == "fake":
+    from fakes import FakeToolCallingChatModel
 
-client = MultiServerMCPClient(
-    {
-        "legal_tools_mcp": {
-            "url": "http://localhost:8080/mcp/", 
-            "transport": "streamable_http",
-        }
-    }
-)
+    model = FakeToolCallingChatModel()
+else:
+    model =  ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash",
+        max_retries=0,
+    )
+llm = get_gateway()
+
+
+# Tools are discovered lazily on the first request and served over a pool of
+# long-lived MCP sessions, so importing this module never touches the network.
+tool_pool = MCPToolPool()  # MCP_URL, default http://localhost:8080/mcp/
+
+_bound = {"version": None, "model_with_tools": None, "tool_node": None}
 
-import asyncio
 
 async def setup_tools_and_nodes():
 
-    tools = await client.get_tools()
+    tools = await tool_pool.get_tools()
+
+    if _bound["version"] != tool_pool.version:
+        _bound["model_with_tools"] = model.bind_tools(tools)
+        _bound["tool_node"] = ToolNode(tools)
+        _bound["version"] = tool_pool.version
+    return tools, _bound["model_with_tools"], _bound["tool_node"]
+
+
+class AgentState(MessagesState):
+    summary: str
+
+
+def content_text(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part if isinstance(part, str) else str(part.get("text", "")) for part in content)
+    return str(content)
+
+
+def estimate_tokens(messages) -> int:
+    return sum(len(content_text(m.content)) for m in messages) // 4
+
+
+def conversation_signature(messages) -> list:
+    """Role, text and tool calls of each message, without the per-message and tool-call ids.
 
-    model_with_tools = model.bind_tools(tools)
+    Those ids are random per conversation, so keying on them would keep two
+    identical conversations from ever sharing a model call.
+    """
+    return [
+        (m.type, content_text(m.content), [(c["name"], c["args"]) for c in getattr(m, "tool_calls", None) or []])
+        for m in messages
+    ]
 
 
-    tool_node = ToolNode(tools)
-    return tools, model_with_tools, tool_node
+def compact_tool_results(messages) -> list:
+    """Shortened copies of the large tool results the model has already answered from.
 
-tools, model_with_tools, tool_node = asyncio.run(setup_tools_and_nodes())
+    Returned messages keep their ids, so the reducer replaces the originals.
+    """
+    last_ai = max((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), default=-1)
+    compacted = []
+    for m in messages[:last_ai]:
+        if not isinstance(m, ToolMessage) or m.response_metadata.get("compacted"):
+            continue
+        text = content_text(m.content)
+        if len(text) <= TOOL_RESULT_MAX_CHARS:
+            continue
+        compacted.append(ToolMessage(
+            content=f"{text[:TOOL_RESULT_MAX_CHARS]}\n[... {len(text) - TOOL_RESULT_MAX_CHARS} characters of tool output omitted after use]",
+            tool_call_id=m.tool_call_id,
+            name=m.name,
+            id=m.id,
+            response_metadata={"compacted": True},
+        ))
+    return compacted
+
+
+async def summarize(summary: str, messages) -> str:
+    transcript = "\n".join(f"{m.type}: {content_text(m.content)}" for m in messages if content_text(m.content))
+    prompt = f"""Update the summary of a conversation between a user and a legal assistant.
+Keep the facts, documents (with their doc handles), dates, jurisdictions and conclusions that later questions may refer to. Be concise.
+
+Current summary:
+{summary or "(none)"}
+
+New messages:
+{transcript}
+
+Updated summary:"""
+    response = await llm.call(lambda: model.ainvoke(prompt))
+    return content_text(response.content).strip()
+
+
+async def manage_memory(state: AgentState):
+    """Runs at the start of each turn and keeps the stored history bounded."""
+    messages = state["messages"]
+    removed = set()
+
+    # A cancelled run can leave tool calls without results, which the model API rejects
+    answered = {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+    for m in messages:
+        if isinstance(m, AIMessage) and m.tool_calls and not all(c["id"] in answered for c in m.tool_calls):
+            call_ids = {c["id"] for c in m.tool_calls}
+            removed.add(m.id)
+            removed.update(t.id for t in messages if isinstance(t, ToolMessage) and t.tool_call_id in call_ids)
+
+    update = {}
+    remaining = [m for m in messages if m.id not in removed]
+    turns = [i for i, m in enumerate(remaining) if isinstance(m, HumanMessage)]
+    if len(turns) > HISTORY_KEEP_TURNS and estimate_tokens(remaining) > HISTORY_TOKEN_BUDGET:
+        old = remaining[:turns[-HISTORY_KEEP_TURNS]]
+        update["summary"] = await summarize(state.get("summary", ""), old)
+        removed.update(m.id for m in old)
+        logger.info(f"Folded {len(old)} messages into the conversation summary")
+
+    update["messages"] = [RemoveMessage(id=i) for i in removed]
+    return update
 
 
 def should_continue(state: MessagesState):
@@ -47,21 +160,62 @@ def should_continue(state: MessagesState):
     return END
 
 
-async def call_model(state: MessagesState):
-    messages = state["messages"]
-    response = await model_with_tools.ainvoke(messages)
-    return {"messages": [response]}
+async def call_model(state: AgentState):
+    compacted = compact_tool_results(state["messages"])
+    replaced = {m.id: m for m in compacted}
+    messages = [replaced.get(m.id, m) for m in state["messages"]]
+    if state.get("summary"):
+        messages = [SystemMessage(f"Summary of the earlier conversation:\n{state['summary']}")] + messages
+    _, model_with_tools, _ = await setup_tools_and_nodes()
+    # Identical concurrent conversations share one Gemini call
+    key = request_key(model.model, tool_pool.version, conversation_signature(messages))
+    response = await llm.call(lambda: model_with_tools.ainvoke(messages), key=key)
+    return {"messages": compacted + [response]}
 
-builder = StateGraph(MessagesState)
+
+async def call_tools(state: MessagesState):
+    _, _, tool_node = await setup_tools_and_nodes()
+    return await tool_node.ainvoke(state)
+
+
+builder = StateGraph(AgentState)
+builder.add_node("memory", manage_memory)
 builder.add_node("call_model", call_model)
-builder.add_node("tools", tool_node)
+builder.add_node("tools", call_tools)
 
-builder.add_edge(START, "call_model")
+builder.add_edge(START, "memory")
+builder.add_edge("memory", "call_model")
 builder.add_conditional_edges("call_model", should_continue)
 builder.add_edge("tools", "call_model")
 
 
+# Stateless graph, for single-shot use without a thread_id
 graph = builder.compile()
+
+_checkpointed = {"graph": None}
+_checkpointed_lock = asyncio.Lock()
+
+
+async def open_checkpointer():
+    """SQLite checkpointer at CHECKPOINT_DB, or an in-process one if the sqlite saver is not installed."""
+    try:
+        import aiosqlite
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError:
+        logger.warning("langgraph-checkpoint-sqlite is not installed; conversation memory will not survive a restart")
+        return MemorySaver()
+    os.makedirs(os.path.dirname(CHECKPOINT_DB), exist_ok=True)
+    saver = AsyncSqliteSaver(await aiosqlite.connect(CHECKPOINT_DB))
+    await saver.setup()
+    return saver
+
+
+async def get_graph():
+    """Graph with persistent conversation memory; invoke it with config {"configurable": {"thread_id": ...}}."""
+    async with _checkpointed_lock:
+        if _checkpointed["graph"] is None:
+            _checkpointed["graph"] = builder.compile(checkpointer=await open_checkpointer())
+    return _checkpointed["graph"]
 # async def main():
 #     response = await graph.ainvoke(
 #         {"messages": [{"role": "user", "content": "Add 45 days to 2025-08-01."}]}
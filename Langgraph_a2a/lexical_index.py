@@ -0,0 +1,130 @@
+import json
+import logging
+import math
+import re
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LEXICAL_FILE = "lexical.json"
+
+# Exact-term tokens are kept whole as well as split into words:
+#   "[INSERT NUMBER OF DAYS]", "§ 2802", "12.3(b)", "29 U.S.C. 201"
+_EXACT_TOKEN = re.compile(r"\[[^\]\n]{1,80}\]|§+\s*\d[\w.\-()]*|\b\d+(?:\.\d+)+(?:\([a-z0-9]+\))*|\b[A-Z](?:\.[A-Z])+\.?")
+_WORD_TOKEN = re.compile(r"\w+")
+
+RRF_K = 60
+
+
+def exact_terms(text: str) -> list[str]:
+    """Normalized exact-term tokens (brackets, citations, clause numbers) found in text."""
+    return [re.sub(r"\s+", " ", m.group(0).lower()) for m in _EXACT_TOKEN.finditer(text)]
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens plus whole exact-term tokens (brackets, citations, clause numbers)."""
+    return _WORD_TOKEN.findall(text.lower()) + exact_terms(text)
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of chunks with a precomputed inverted index.
+
+    Postings are stored per term as parallel (chunk position, term frequency)
+    arrays so a query only touches the chunks that contain its terms.
+    """
+
+    def __init__(self, postings: dict, doc_lengths: np.ndarray, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        self.n_docs = len(self.doc_lengths)
+        self.avg_length = float(self.doc_lengths.mean()) if self.n_docs else 0.0
+        self.postings = {
+            term: (np.asarray(ids, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+            for term, (ids, tfs) in postings.items()
+        }
+
+    @classmethod
+    def build(cls, texts, **kwargs) -> "BM25Index":
+        start = time.perf_counter()
+        postings = defaultdict(lambda: ([], []))
+        lengths = []
+        for position, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                ids, tfs = postings[term]
+                ids.append(position)
+                tfs.append(tf)
+        index = cls(postings, lengths, **kwargs)
+        logger.info(
+            f"Built lexical index: {index.n_docs} chunks, {len(index.postings)} terms "
+            f"in {(time.perf_counter() - start) * 1000:.1f} ms"
+        )
+        return index
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings[term][0]) if term in self.postings else 0
+        return math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 10) -> list[tuple[int, float]]:
+        """Top-k (chunk position, BM25 score) pairs, best first. Chunks with no matching term are skipped."""
+        if not self.n_docs:
+            return []
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_length, 1e-9))
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            ids, tfs = self.postings[term]
+            scores[ids] += self.idf(term) * tfs * (self.k1 + 1) / (tfs + norm[ids])
+
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        top = hits[np.argsort(-scores[hits], kind="stable")[:k]]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "k1": self.k1,
+                    "b": self.b,
+                    "doc_lengths": self.doc_lengths.tolist(),
+                    "postings": {t: (ids.tolist(), tfs.tolist()) for t, (ids, tfs) in self.postings.items()},
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        return cls(raw["postings"], raw["doc_lengths"], k1=raw["k1"], b=raw["b"])
+
+
+def reciprocal_rank_fusion(rankings, k: int = RRF_K) -> list[tuple[object, float]]:
+    """Fuse several best-first lists of keys into one, scoring each key by sum(1 / (k + rank))."""
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            fused[key] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def lexical_is_decisive(query: str, hits, margin: float) -> bool:
+    """True when the lexical results are clear enough to skip the dense search.
+
+    Only exact-term queries qualify (a bracketed placeholder, section sign or
+    clause number), and only when the best hit scores at least `margin` times
+    the runner-up, or is the only hit.
+    """
+    if not hits or margin <= 0 or not _EXACT_TOKEN.search(query):
+        return False
+    if len(hits) == 1:
+        return True
+    return hits[0][1] >= margin * hits[1][1]
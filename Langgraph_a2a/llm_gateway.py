@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = os.getenv("LLM_MODEL", "gemini-2.5-flash")
+DEFAULT_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+DEFAULT_RATE = float(os.getenv("LLM_RATE_PER_SECOND", 5))
+DEFAULT_BURST = int(os.getenv("LLM_BURST", 10))
+DEFAULT_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+# Retries allowed as a share of first attempts, so an outage does not multiply the load
+DEFAULT_RETRY_BUDGET = float(os.getenv("LLM_RETRY_BUDGET", 0.2))
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+# --------------------------
+# Backends
+# --------------------------
+class GeminiBackend:
+    """Real Gemini calls through one shared async google-genai client (keep-alive connection pool)."""
+
+    def __init__(self, api_key: str | None = None):
+        from google import genai
+
+        self.client = genai.Client(api_key=api_key or os.getenv("GOOGLE_API_KEY"))
+
+    async def generate(self, model: str, prompt: str, config: dict | None = None) -> str:
+        response = await self.client.aio.models.generate_content(model=model, contents=prompt, config=config)
+        return response.text
+
+
+class FakeBackend:
+    """Deterministic offline stand-in: answers with a digest of the prompt after `latency` seconds.
+
+    Args:
+        latency (float): Seconds each call takes.
+        failures (int): Number of initial calls that fail with a retryable 503, for testing retries.
+        responder: Optional callable(model, prompt) -> str to script answers.
+    """
+
+    def __init__(self, latency: float = float(os.getenv("LLM_FAKE_LATENCY", 0.05)), failures: int = 0, responder=None):
+        self.latency = latency
+        self.failures = failures
+        self.responder = responder
+        self.calls = 0
+
+    async def generate(self, model: str, prompt: str, config: dict | None = None) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.failures > 0:
+            self.failures -= 1
+            raise BackendError(503, "fake backend unavailable")
+        if self.responder is not None:
+            return self.responder(model, prompt)
+        return f"[{model} fake answer {hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]}]"
+
+
+class BackendError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+
+
+def is_retryable(e: Exception) -> bool:
+    """Rate limits, server errors and transport failures are retried; anything else is not."""
+    code = getattr(e, "code", None) or getattr(e, "status_code", None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS
+    if isinstance(e, (asyncio.TimeoutError, ConnectionError, TimeoutError)):
+        return True
+    name = type(e).__name__
+    return "Timeout" in name or "Connect" in name or "ResourceExhausted" in name or "Unavailable" in name
+
+
+# --------------------------
+# Rate limiting and retries
+# --------------------------
+class TokenBucket:
+    """Async token bucket; `acquire` reserves a token and sleeps until it is due."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class RetryBudget:
+    """Allows at most `ratio` retries per first attempt (plus a small floor)."""
+
+    def __init__(self, ratio: float, floor: int = 10):
+        self.ratio = ratio
+        self.floor = floor
+        self.attempts = 0
+        self.retries = 0
+
+    def record_attempt(self) -> None:
+        self.attempts += 1
+
+    def try_spend(self) -> bool:
+        if self.retries < self.floor + self.ratio * self.attempts:
+            self.retries += 1
+            return True
+        return False
+
+
+class LLMGateway:
+    """Single entry point for LLM calls from the MCP server and the LangGraph agent.
+
+    Every call goes through a token-bucket rate limiter and is retried with
+    full-jitter exponential backoff on retryable errors, within a global
+    retry budget. Identical concurrent calls (same key) share one in-flight
+    request instead of each hitting the API; the shared request is cancelled
+    once every caller waiting on it has been cancelled.
+
+    Args:
+        backend: Object with `async generate(model, prompt, config) -> str`.
+        rate (float): Sustained requests per second (0 disables limiting).
+        burst (int): Requests allowed back to back.
+        max_retries (int): Retries per call.
+        retry_budget (float): Retries allowed per first attempt across all calls.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        retry_budget: float = DEFAULT_RETRY_BUDGET,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+    ):
+        self._backend = backend
+        self.bucket = TokenBucket(rate, burst)
+        self.budget = RetryBudget(retry_budget)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._waiters: dict[str, int] = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def backend(self):
+        # Created on first text generation; callers that only use `call` never need one
+        if self._backend is None:
+            self._backend = make_backend()
+        return self._backend
+
+    async def call(self, factory, key: str | None = None):
+        """Run `await factory()` with rate limiting, retries and (if `key` is given) coalescing."""
+        self.requests += 1
+        with span("llm"):
+            if key is None:
+                return await self._with_retries(factory)
+
+            shared = self._inflight.get(key)
+            if shared is not None and not shared.done():
+                self.coalesced += 1
+            else:
+                shared = asyncio.ensure_future(self._with_retries(factory))
+                self._inflight[key] = shared
+                self._waiters[key] = 0
+                shared.add_done_callback(lambda future: self._forget(key, future))
+            self._waiters[key] += 1
+            try:
+                # Shielded so one caller giving up does not cancel the request for the others
+                return await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if self._inflight.get(key) is shared:
+                    self._waiters[key] -= 1
+                    if self._waiters[key] == 0:
+                        # Nobody is left to read the result; stop spending quota on it
+                        shared.cancel()
+                raise
+
+    def _forget(self, key: str, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key], self._waiters[key]
+
+    async def generate(self, prompt: str, model: str = DEFAULT_MODEL, config: dict | None = None) -> str:
+        """Text completion for a prompt; identical concurrent prompts are coalesced."""
+        key = request_key(model, prompt, config)
+        return await self.call(lambda: self.backend.generate(model, prompt, config), key=key)
+
+    async def _with_retries(self, factory):
+        self.budget.record_attempt()
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            try:
+                return await factory()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e) or not self.budget.try_spend():
+                    self.failed += 1
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                attempt += 1
+                self.retried += 1
+                logger.warning(f"LLM call failed ({e!r}), retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self._backend).__name__ if self._backend is not None else None,
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "retried": self.retried,
+            "failed": self.failed,
+            "in_flight": len(self._inflight),
+        }
+
+
+def request_key(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def make_backend(name: str = DEFAULT_BACKEND):
+    if name == "fake":
+        return FakeBackend()
+    if name == "gemini":
+        return GeminiBackend()
+    raise ValueError(f"Unknown LLM backend {name!r}, expected 'gemini' or 'fake'")
+
+
+_gateway = None
+
+
+def get_gateway() -> LLMGateway:
+    """Process-wide gateway, created on first use (backend from LLM_BACKEND)."""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
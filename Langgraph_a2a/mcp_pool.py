@@ -0,0 +1,249 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+from langchain_core.tools import StructuredTool, ToolException
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+
+from tool_cache import DEFAULT_TOOL_TIMEOUT, DEFAULT_TOOL_TIMEOUTS, ToolResultCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MCP_URL = os.getenv("MCP_URL", "http://localhost:8080/mcp/")
+DEFAULT_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", 4))
+DEFAULT_REFRESH_INTERVAL = float(os.getenv("MCP_TOOLS_REFRESH_SECONDS", 300))
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("MCP_CONNECT_TIMEOUT", 10))
+MAX_BACKOFF = 30.0
+
+
+def _result_text(result) -> str:
+    parts = []
+    for content in result.content:
+        text = getattr(content, "text", None)
+        parts.append(text if text is not None else json.dumps(content.model_dump(), default=str))
+    return "\n".join(parts)
+
+
+class MCPToolPool:
+    """Long-lived pool of streamable-HTTP MCP sessions with lazily discovered tools.
+
+    Each session is owned by its own worker task, which connects on start,
+    serves requests from a shared queue, and reconnects with jittered
+    exponential backoff when the connection fails. Nothing touches the
+    network until the first `get_tools` / `call_tool`, so importing the agent
+    does not depend on the MCP server being up. Tool schemas are cached and
+    refreshed in the background every `refresh_interval` seconds.
+
+    Tool calls go through `cache`: results of pure tools are memoized (and
+    only pure tools are retried after a transport failure), every call is
+    bounded by its per-tool timeout, and each one is recorded as a hit,
+    miss, timeout or error. Several calls from one model turn run
+    concurrently on different sessions.
+
+    Args:
+        url (str): MCP streamable-HTTP endpoint.
+        size (int): Number of sessions kept open.
+        refresh_interval (float): Seconds between background tool-list refreshes (0 disables).
+        connect_timeout (float): How long discovery waits for a connected session.
+        cache (ToolResultCache): Result cache and call statistics, a fresh one by default.
+        timeouts (dict): Per-tool call timeouts in seconds; other tools use DEFAULT_TOOL_TIMEOUT.
+    """
+
+    def __init__(
+        self,
+        url: str = DEFAULT_MCP_URL,
+        size: int = DEFAULT_POOL_SIZE,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        cache: ToolResultCache | None = None,
+        timeouts: dict | None = None,
+    ):
+        self.url = url
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.connect_timeout = connect_timeout
+        self.cache = cache if cache is not None else ToolResultCache()
+        self.timeouts = DEFAULT_TOOL_TIMEOUTS if timeouts is None else timeouts
+        self.tools: list = []
+        self.version = 0
+        self._signature = None
+        self._loop = None
+        self._requests: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._discover_lock: asyncio.Lock | None = None
+        self.connected = 0
+
+    # --------------------------
+    # Lifecycle
+    # --------------------------
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # First use, or a new event loop (e.g. asyncio.run called again): start fresh workers on it.
+        self._loop = loop
+        self._requests = asyncio.Queue()
+        self._discover_lock = asyncio.Lock()
+        self.connected = 0
+        self._tasks = [loop.create_task(self._worker(i)) for i in range(self.size)]
+        if self.refresh_interval > 0:
+            self._tasks.append(loop.create_task(self._refresh_loop()))
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    async def _worker(self, n: int) -> None:
+        backoff = 0.5
+        while True:
+            try:
+                async with streamablehttp_client(self.url) as (read, write, _):
+                    async with ClientSession(read, write) as session:
+                        await session.initialize()
+                        self.connected += 1
+                        backoff = 0.5
+                        try:
+                            await self._serve(session)
+                        finally:
+                            self.connected -= 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = backoff * (1 + random.random())
+                logger.warning(f"MCP session {n} to {self.url} failed ({e!r}); reconnecting in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+    async def _serve(self, session: ClientSession) -> None:
+        while True:
+            fn, future = await self._requests.get()
+            if future.done():
+                continue
+            call = asyncio.ensure_future(fn(session))
+            # A caller that gives up (cancel / timeout) also stops its MCP request.
+            future.add_done_callback(lambda f, c=call: c.cancel() if f.cancelled() else None)
+            try:
+                result = await call
+            except asyncio.CancelledError:
+                if call.cancelled() and future.cancelled():
+                    continue
+                raise
+            except McpError as e:
+                # Protocol-level error for this request; the session itself is fine.
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                raise
+            if not future.done():
+                future.set_result(result)
+
+    async def run(self, fn, timeout: float | None = None, retries: int = 0):
+        """Run `fn(session)` on a pooled session and return its result.
+
+        Transport failures are retried `retries` times on another (or
+        reconnected) session; MCP protocol errors are raised as-is. Only
+        idempotent requests should be retried: the connection may have
+        dropped after the server already ran the call.
+        """
+        self._ensure_started()
+        for attempt in range(retries + 1):
+            future = self._loop.create_future()
+            await self._requests.put((fn, future))
+            try:
+                return await asyncio.wait_for(future, timeout)
+            except (asyncio.CancelledError, asyncio.TimeoutError, McpError):
+                raise
+            except Exception:
+                if attempt == retries:
+                    raise
+
+    # --------------------------
+    # Tools
+    # --------------------------
+    async def discover(self) -> list:
+        """Fetch the tool list now and rebuild the LangChain tools if it changed."""
+        self._ensure_started()
+        async with self._discover_lock:
+            result = await self.run(lambda session: session.list_tools(), timeout=self.connect_timeout, retries=1)
+            signature = json.dumps(
+                [(t.name, t.description, t.inputSchema) for t in result.tools], sort_keys=True, default=str
+            )
+            if signature != self._signature:
+                self.tools = [self._to_langchain(t) for t in result.tools]
+                self._signature = signature
+                self.version += 1
+                logger.info(f"Discovered {len(self.tools)} MCP tools (version {self.version})")
+            return self.tools
+
+    async def get_tools(self) -> list:
+        """Cached tools, discovering them on first use."""
+        if not self.tools:
+            return await self.discover()
+        self._ensure_started()
+        return self.tools
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.discover()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"MCP tool refresh failed, keeping cached tools: {e!r}")
+
+    async def call_tool(self, name: str, arguments: dict, timeout: float | None = None) -> str:
+        """Call an MCP tool, serving pure tools from the cache when possible."""
+        if timeout is None:
+            timeout = self.timeouts.get(name, DEFAULT_TOOL_TIMEOUT)
+        start = time.perf_counter()
+        pure = self.cache.is_pure(name)
+        if pure:
+            cached = self.cache.get(name, arguments)
+            if cached is not None:
+                self.cache.record(name, "hit", (time.perf_counter() - start) * 1000)
+                return cached
+
+        try:
+            # Tools that change state (register_document, corpus add/remove) must not run twice
+            result = await self.run(
+                lambda session: session.call_tool(name, arguments), timeout=timeout, retries=1 if pure else 0
+            )
+        except asyncio.TimeoutError:
+            self.cache.record(name, "timeout", (time.perf_counter() - start) * 1000)
+            raise ToolException(f"Tool {name} did not answer within {timeout:g} seconds.")
+        except Exception:
+            self.cache.record(name, "error", (time.perf_counter() - start) * 1000)
+            raise
+        text = _result_text(result)
+        if result.isError:
+            self.cache.record(name, "error", (time.perf_counter() - start) * 1000)
+            raise ToolException(text)
+
+        if pure:
+            self.cache.put(name, arguments, text)
+        self.cache.record(name, "miss" if pure else "call", (time.perf_counter() - start) * 1000)
+        return text
+
+    def _to_langchain(self, tool) -> StructuredTool:
+        async def call(**arguments):
+            return await self.call_tool(tool.name, arguments)
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description or "",
+            args_schema=tool.inputSchema,
+            coroutine=call,
+            handle_tool_error=True,
+        )
@@ -1,23 +1,39 @@
+import asyncio
 from mcp.server.fastmcp import FastMCP
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 import docx
+import json
+import logging
 import os
-from tempfile import NamedTemporaryFile
+import time
+import numpy as np
 from mcp.server import Server
 from mcp.server.fastmcp import FastMCP
 from langchain.document_loaders import PyPDFLoader
-from sentence_transformers import SentenceTransformer, util
-from nltk.tokenize import sent_tokenize
-from langchain.schema import Document
-from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.vectorstores import FAISS
-from google import genai
 from dotenv import load_dotenv
+from index_cache import IndexCache, cache_key_for_digest
+from embedding_service import SharedEmbeddings, get_engine
+from chunking import MAX_CHUNK_TOKENS, SIMILARITY_THRESHOLD, semantic_chunks
+from context_budget import CONTEXT_TOKEN_BUDGET, assemble_context
+from ingestion import stream_pdf_chunks
+from corpus_index import CorpusIndex
+from answer_cache import SemanticAnswerCache
+from lexical_index import LEXICAL_FILE, BM25Index, lexical_is_decisive, reciprocal_rank_fusion
+from worker_pool import ToolExecutor
+from document_store import DocumentStore
+from llm_gateway import get_gateway
+import base64
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+logger = logging.getLogger(__name__)
 mcp = FastMCP("mcp", port=8080)
 
+# Heavy tools (PDF parsing, chunking, embedding, docx generation) run here so cheap
+# tools are never stuck behind them on the event loop. MCP_WORKER_KIND=thread|process.
+tool_executor = ToolExecutor()
+
 # --------------------------
 # 1. Policy Comparator Tool
 # --------------------------
@@ -82,7 +98,7 @@ def add_days_to_date(input_date: str, duration_days: str) -> dict:
 # 3. Legal Document Formatter Tool
 # --------------------------
 @mcp.tool()
-def legal_doc_formatter(content: str, filename: str = "legal_output.docx") -> dict:
+async def legal_doc_formatter(content: str, filename: str = "legal_output.docx") -> dict:
     """Format text into a legal .docx document.
 
     Args:
@@ -93,40 +109,54 @@ def legal_doc_formatter(content: str, filename: str = "legal_output.docx") -> di
         dict: file path and status.
     """
     try:
-        doc = docx.Document()
-        doc.add_heading("Legal Document", 0)
-
-        for section in content.split("\n\n"):
-            doc.add_paragraph(section)
-
-        filepath = os.path.abspath(filename)
-        doc.save(filepath)
-
+        filepath = await tool_executor.run(write_legal_docx, content, filename)
         return {"status": "success", "file": filepath}
     except Exception as e:
         return {"status": "error", "error_message": str(e)}
 
-client = genai.Client(api_key=GOOGLE_API_KEY)
 
+def write_legal_docx(content: str, filename: str) -> str:
+    doc = docx.Document()
+    doc.add_heading("Legal Document", 0)
 
-def semantic_chunker(text: str, similarity_threshold: float = 0.85):
-    sentences = sent_tokenize(text)
-    model = SentenceTransformer("multi-qa-mpnet-base-dot-v1")
-    embeddings = model.encode(sentences, convert_to_tensor=True)
+    for section in content.split("\n\n"):
+        doc.add_paragraph(section)
 
-    chunks = []
-    current_chunk = [sentences[0]]
-    for i in range(1, len(sentences)):
-        similarity = util.pytorch_cos_sim(embeddings[i - 1], embeddings[i]).item()
-        if similarity > similarity_threshold:
-            current_chunk.append(sentences[i])
-        else:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = [sentences[i]]
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
+    filepath = os.path.abspath(filename)
+    doc.save(filepath)
+    return filepath
+
+# Rate-limited, retrying, coalescing Gemini client shared by every tool (LLM_BACKEND=fake for offline runs)
+llm = get_gateway()
+
+# "mean" builds chunk vectors from the sentence embeddings, "reencode" embeds each chunk again
+CHUNK_EMBEDDING = os.getenv("RAG_CHUNK_EMBEDDING", "mean")
+# "streaming" parses/chunks/embeds page by page with bounded memory, "full" loads the whole PDF first
+INGESTION_MODE = os.getenv("RAG_INGESTION", "streaming")
+RETRIEVAL_K = 3
+# Candidates taken from each retriever before reciprocal-rank fusion
+FUSION_FETCH_K = 10
+# Skip the dense search when the best BM25 hit for an exact-term query beats the runner-up by this factor (0 disables)
+LEXICAL_DECISIVE_MARGIN = float(os.getenv("RAG_LEXICAL_DECISIVE_MARGIN", 2.0))
+# Gemini requests in flight at once for rag_query_batch
+BATCH_MAX_CONCURRENCY = int(os.getenv("RAG_BATCH_MAX_CONCURRENCY", 4))
+index_cache = IndexCache()
+
+# One copy of the mpnet weights for every tool call; concurrent encodes are micro-batched.
+embedding_engine = get_engine()
+# Fake (offline) vectors must never share cache entries with the real model's
+EMBEDDING_MODEL = embedding_engine.model_name if embedding_engine.backend != "fake" else "fake-hashing"
+
+# Persistent multi-document corpus; the notebook's prebuilt index is imported into it on first start
+corpus = CorpusIndex()
+PREBUILT_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "rag", "faiss_index_google")
+
+# Documents are uploaded once and then referred to by a short content-addressed handle
+document_store = DocumentStore()
+
+# Near-duplicate questions on the same document reuse the previous answer instead of calling Gemini
+answer_cache = SemanticAnswerCache()
 
-    return [Document(page_content=chunk) for chunk in chunks]
 
 @mcp.tool()
 def jurisdiction_checker(jurisdiction: str) -> dict:
@@ -137,34 +167,246 @@ def jurisdiction_checker(jurisdiction: str) -> dict:
     else:
         return {"status": "error", "message": f"{jurisdiction} not supported."}
 
+
+def build_index(pdf_path: str, embedding_model):
+    """Chunk and embed a PDF into a FAISS index. Returns (db, chunks)."""
+    if INGESTION_MODE == "streaming":
+        db, chunks, texts, vectors = None, [], [], []
+        for chunk, vector in stream_pdf_chunks(pdf_path, SIMILARITY_THRESHOLD, CHUNK_EMBEDDING, embedding_engine):
+            chunks.append(chunk)
+            texts.append(chunk.page_content)
+            vectors.append(vector.tolist())
+            # Add to the index in small batches so vectors are not all held twice
+            if len(texts) >= 64:
+                db = add_to_index(db, texts, vectors, chunks[-len(texts):], embedding_model)
+                texts, vectors = [], []
+        if texts:
+            db = add_to_index(db, texts, vectors, chunks[-len(texts):], embedding_model)
+        if db is None:
+            raise ValueError("No text could be extracted from the PDF.")
+        return db, chunks
+
+    # Load PDF
+    docs = PyPDFLoader(pdf_path).load()
+
+    # Chunk into semantic sections
+    full_text = " ".join([doc.page_content for doc in docs])
+    chunks, vectors = semantic_chunks(full_text, SIMILARITY_THRESHOLD, CHUNK_EMBEDDING, embedding_engine)
+
+    # Build FAISS index from the vectors the chunker already produced
+    db = add_to_index(None, [c.page_content for c in chunks], vectors.tolist(), chunks, embedding_model)
+    return db, chunks
+
+
+def index_settings() -> dict:
+    return {
+        "chunker": "semantic_chunks",
+        "ingestion": INGESTION_MODE,
+        "similarity_threshold": SIMILARITY_THRESHOLD,
+        "max_chunk_tokens": MAX_CHUNK_TOKENS,
+        "chunk_embedding": CHUNK_EMBEDDING,
+        "embedding_model": EMBEDDING_MODEL,
+    }
+
+
+def build_and_cache(pdf_path: str, key: str, settings: dict):
+    """Build the dense and lexical indexes for a PDF and store them in the index cache.
+
+    Returns:
+        tuple: (db, chunks, lexical, timings)
+    """
+    timings = {}
+    start = time.perf_counter()
+    db, chunks = build_index(pdf_path, SharedEmbeddings(embedding_engine))
+    timings["dense_build_ms"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    lexical = BM25Index.build([c.page_content for c in chunks])
+    timings["lexical_build_ms"] = (time.perf_counter() - start) * 1000
+    index_cache.put(key, db, chunks, settings, artifacts={LEXICAL_FILE: lexical})
+    return db, chunks, lexical, timings
+
+
+def ingest_pdf(pdf_path: str, key: str, settings: dict) -> dict:
+    """`build_and_cache` for process workers: only the timings cross back, the index goes through the cache."""
+    return build_and_cache(pdf_path, key, settings)[3]
+
+
+def load_index(key: str):
+    """(db, chunks, lexical) for a cached entry, or None on a miss."""
+    db = index_cache.get(key, SharedEmbeddings(embedding_engine))
+    if db is None:
+        return None
+    chunks = index_cache.get_chunks(key)
+    lexical_path = index_cache.artifact_path(key, LEXICAL_FILE)
+    lexical = BM25Index.load(lexical_path) if os.path.isfile(lexical_path) else BM25Index.build([c.page_content for c in chunks])
+    return db, chunks, lexical
+
+
+async def get_or_build_index(pdf_path: str, key: str, settings: dict, timings: dict):
+    # Same PDF + same settings -> reuse the stored index and go straight to retrieval
+    start = time.perf_counter()
+    loaded = await asyncio.to_thread(load_index, key)
+    if loaded is not None:
+        timings["cache_load_ms"] = (time.perf_counter() - start) * 1000
+        return loaded
+
+    if tool_executor.kind == "process":
+        timings.update(await tool_executor.run(ingest_pdf, pdf_path, key, settings))
+        loaded = await asyncio.to_thread(load_index, key)
+        if loaded is not None:
+            return loaded
+        logger.warning("Index built in a worker process could not be read back from the cache, rebuilding in a thread")
+        db, chunks, lexical, build_timings = await asyncio.to_thread(build_and_cache, pdf_path, key, settings)
+    else:
+        db, chunks, lexical, build_timings = await tool_executor.run(build_and_cache, pdf_path, key, settings)
+    timings.update(build_timings)
+    return db, chunks, lexical
+
+
+def hybrid_retrieve(question: str, db, lexical, chunks, k: int = RETRIEVAL_K, timings: dict | None = None, query_vector=None):
+    """BM25 + dense MMR retrieval fused with reciprocal-rank fusion.
+
+    The dense search is skipped when the lexical hits are decisive; without
+    `query_vector` that also skips embedding the question. rag_query and
+    rag_query_batch embed the question up front (the answer cache and
+    context assembly need it), so for them only the FAISS search is saved.
+    Per-stage latencies are written into `timings`.
+    """
+    timings = timings if timings is not None else {}
+
+    start = time.perf_counter()
+    hits = lexical.search(question, FUSION_FETCH_K)
+    timings["lexical_ms"] = (time.perf_counter() - start) * 1000
+    lexical_docs = [chunks[i] for i, _ in hits]
+
+    if lexical_is_decisive(question, hits, LEXICAL_DECISIVE_MARGIN):
+        timings["dense_skipped"] = True
+        return lexical_docs[:k]
+
+    start = time.perf_counter()
+    if query_vector is None:
+        dense_docs = db.max_marginal_relevance_search(question, k=FUSION_FETCH_K)
+    else:
+        dense_docs = db.max_marginal_relevance_search_by_vector(np.asarray(query_vector).tolist(), k=FUSION_FETCH_K)
+    timings["dense_ms"] = (time.perf_counter() - start) * 1000
+    timings["dense_skipped"] = False
+
+    start = time.perf_counter()
+    fused = fuse(lexical_docs, dense_docs, k)
+    timings["fusion_ms"] = (time.perf_counter() - start) * 1000
+    return fused
+
+
+def fuse(lexical_docs, dense_docs, k: int):
+    by_text = {doc.page_content: doc for doc in lexical_docs + dense_docs}
+    fused = reciprocal_rank_fusion([
+        [doc.page_content for doc in lexical_docs],
+        [doc.page_content for doc in dense_docs],
+    ])
+    return [by_text[text] for text, _ in fused[:k]]
+
+
+def batch_retrieve(questions, query_vectors: np.ndarray, db, lexical, chunks, k: int = RETRIEVAL_K):
+    """Hybrid retrieval for many questions with one FAISS search over the whole query matrix.
+
+    Dense candidates come from a single `index.search` call (plain nearest
+    neighbours, no per-question MMR); lexical hits and fusion are per question.
+    """
+    _, ids = db.index.search(np.ascontiguousarray(query_vectors, dtype=np.float32), FUSION_FETCH_K)
+    results = []
+    for question, row in zip(questions, ids):
+        hits = lexical.search(question, FUSION_FETCH_K)
+        lexical_docs = [chunks[i] for i, _ in hits]
+        if lexical_is_decisive(question, hits, LEXICAL_DECISIVE_MARGIN):
+            results.append(lexical_docs[:k])
+            continue
+        dense_docs = [db.docstore.search(db.index_to_docstore_id[i]) for i in row.tolist() if i >= 0]
+        results.append(fuse(lexical_docs, dense_docs, k))
+    return results
+
+
+def cite(doc) -> str:
+    """Prefix a chunk with the page(s) it came from, when known (pages are 0-based in metadata)."""
+    if "page" not in doc.metadata:
+        return doc.page_content
+    first, last = doc.metadata["page"] + 1, doc.metadata.get("page_end", doc.metadata["page"]) + 1
+    pages = f"p. {first}" if first == last else f"pp. {first}-{last}"
+    return f"[{pages}] {doc.page_content}"
+
+
+def add_to_index(db, texts, vectors, chunks, embedding_model):
+    pairs = list(zip(texts, vectors))
+    metadatas = [c.metadata for c in chunks]
+    if db is None:
+        return FAISS.from_embeddings(pairs, embedding_model, metadatas=metadatas)
+    db.add_embeddings(pairs, metadatas=metadatas)
+    return db
+
+
 @mcp.tool()
-def rag_query(uploaded_file, question: str) -> str:
+async def register_document(path: str = "", content_base64: str = "") -> dict:
+    """Register a PDF once and get a short handle to pass to rag_query and the corpus tools instead of the file.
+
+    Args:
+        path (str): Local path to the PDF file.
+        content_base64 (str): The PDF bytes, base64-encoded, when there is no local path.
+
+    Returns:
+        dict: status and doc_handle (e.g. "doc-3f2a9c0d1b7e4a65").
+    """
+    try:
+        if path:
+            handle = await asyncio.to_thread(document_store.put_path, path)
+        elif content_base64:
+            handle = await asyncio.to_thread(document_store.put_bytes, base64.b64decode(content_base64))
+        else:
+            return {"status": "error", "error_message": "Provide either path or content_base64."}
+        return {"status": "success", "doc_handle": handle}
+    except Exception as e:
+        return {"status": "error", "error_message": str(e)}
+
+
+@mcp.tool()
+async def rag_query(document: str, question: str) -> str:
     """
-    Answer a question using a provided PDF (RAG), you have to seperate the link and the question and set each of them in the corresponding fields.
+    Answer a question using a PDF (RAG), you have to seperate the document and the question and set each of them in the corresponding fields.
     Args:
-        pdf_path: link to the PDF file.
+        document: doc_handle returned by register_document (preferred), or a local path to the PDF file.
         question: Natural language question to ask.
     """
-    # Load PDF
-    with NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(uploaded_file.read())
-        tmp_path = tmp.name
-    loader = PyPDFLoader(tmp_path)
-    docs = loader.load()
+    settings = index_settings()
+    timings = {}
 
-    # Chunk into semantic sections
-    full_text = " ".join([doc.page_content for doc in docs])
-    chunks = semantic_chunker(full_text)
+    # The handle is the document's sha256, so nothing proportional to the file size happens per question
+    pdf_path, digest = await asyncio.to_thread(document_store.resolve, document)
+    key = cache_key_for_digest(digest, settings)
+
+    # Needed for the semantic answer cache and for context assembly, so it is computed
+    # even when hybrid_retrieve later finds the lexical hits decisive
+    query_vector = await embedding_engine.aencode(question.replace("\n", " "))
+    question_vector = query_vector / max(np.linalg.norm(query_vector), 1e-12)
+    cached = answer_cache.lookup(key, question_vector)
+    if cached is not None:
+        logger.info(f"rag_query answer cache hit (similarity {cached['similarity']:.3f}): {answer_cache.stats()}")
+        return cached["answer"]
 
-    # Build FAISS index
-    embedding_model = HuggingFaceEmbeddings(model_name="multi-qa-mpnet-base-dot-v1")
-    db = FAISS.from_documents(chunks, embedding_model)
-    retriever = db.as_retriever(search_type="mmr", search_kwargs={'k': 3})
+    db, chunks, lexical = await get_or_build_index(pdf_path, key, settings, timings)
 
     # Retrieve context
-    retrieved_docs = retriever.get_relevant_documents(question)
-    context = "\n\n".join([doc.page_content for doc in retrieved_docs])
+    retrieved_docs = await asyncio.to_thread(hybrid_retrieve, question, db, lexical, chunks, RETRIEVAL_K, timings, query_vector)
+    # Keep the prompt within the token budget: best sentences only, near-duplicates removed
+    retrieved_docs = await asyncio.to_thread(
+        assemble_context, retrieved_docs, question, query_vector, embedding_engine, CONTEXT_TOKEN_BUDGET, stats=timings
+    )
+    logger.info(f"rag_query timings: {timings}")
+    context = "\n\n".join([cite(doc) for doc in retrieved_docs])
+
+    answer = await answer_from_context(context, question)
+    answer_cache.store(key, question, question_vector, answer, context)
+    return answer
 
+
+async def answer_from_context(context: str, question: str) -> str:
     # Prompt Gemini
     prompt = f"""Use the following context to answer the question, do not include any personal opinions or information, answer ONLY based on the context provided. If no context is available tell the user you don't know.
     If there are [] in the document especially if they are highlighted and in bold, consider them as filler for dates or numbers or names.
@@ -175,15 +417,217 @@ def rag_query(uploaded_file, question: str) -> str:
     Question: {question}
     Answer:"""
 
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=prompt
+    return await llm.generate(prompt)
+
+
+@mcp.tool()
+async def rag_query_batch(document: str, questions: list[str], questions_per_prompt: int = 1, max_concurrency: int = BATCH_MAX_CONCURRENCY) -> dict:
+    """
+    Answer many questions about the same PDF in one call (e.g. a due-diligence checklist).
+    Args:
+        document: doc_handle returned by register_document (preferred), or a local path to the PDF file.
+        questions: List of natural language questions.
+        questions_per_prompt: How many questions to pack into one Gemini request.
+        max_concurrency: Maximum Gemini requests in flight at once.
+
+    Returns:
+        dict: per-question answers with the retrieved chunks, and stage timings.
+    """
+    settings = index_settings()
+    timings = {}
+    results = [{"question": q, "answer": None, "chunks": [], "cached": False} for q in questions]
+    if not questions:
+        return {"answers": results, "timings": timings}
+
+    pdf_path, digest = await asyncio.to_thread(document_store.resolve, document)
+    key = cache_key_for_digest(digest, settings)
+
+    # One encoder call for every question
+    start = time.perf_counter()
+    query_vectors = await embedding_engine.aencode([q.replace("\n", " ") for q in questions])
+    question_vectors = query_vectors / np.clip(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-12, None)
+    timings["embed_ms"] = (time.perf_counter() - start) * 1000
+
+    pending = []
+    for i, question in enumerate(questions):
+        cached = answer_cache.lookup(key, question_vectors[i])
+        if cached is None:
+            pending.append(i)
+        else:
+            results[i].update(answer=cached["answer"], chunks=cached["context"].split("\n\n"), cached=True)
+
+    if pending:
+        db, chunks, lexical = await get_or_build_index(pdf_path, key, settings, timings)
+
+        start = time.perf_counter()
+        retrieved = await asyncio.to_thread(
+            batch_retrieve, [questions[i] for i in pending], query_vectors[pending], db, lexical, chunks, RETRIEVAL_K
+        )
+        timings["retrieval_ms"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        budget_stats = [{} for _ in pending]
+        trimmed = await asyncio.to_thread(
+            lambda: [
+                assemble_context(docs, questions[i], query_vectors[i], embedding_engine, CONTEXT_TOKEN_BUDGET, stats=stats)
+                for i, docs, stats in zip(pending, retrieved, budget_stats)
+            ]
+        )
+        for i, docs in zip(pending, trimmed):
+            results[i]["chunks"] = [cite(doc) for doc in docs]
+        timings["context_ms"] = (time.perf_counter() - start) * 1000
+        timings["context_tokens_before"] = sum(s["context_tokens_before"] for s in budget_stats)
+        timings["context_tokens_after"] = sum(s["context_tokens_after"] for s in budget_stats)
+
+        start = time.perf_counter()
+        limit = asyncio.Semaphore(max(1, max_concurrency))
+        size = max(1, questions_per_prompt)
+
+        async def answer_group(group):
+            async with limit:
+                items = [(questions[i], "\n\n".join(results[i]["chunks"])) for i in group]
+                answers = await answer_many_from_context(items)
+            for i, answer in zip(group, answers):
+                results[i]["answer"] = answer
+                answer_cache.store(key, questions[i], question_vectors[i], answer, "\n\n".join(results[i]["chunks"]))
+
+        await asyncio.gather(*[answer_group(pending[j:j + size]) for j in range(0, len(pending), size)])
+        timings["generation_ms"] = (time.perf_counter() - start) * 1000
+
+    timings["cache_hits"] = len(questions) - len(pending)
+    logger.info(f"rag_query_batch timings for {len(questions)} questions: {timings}")
+    return {"answers": results, "timings": timings}
+
+
+async def answer_many_from_context(items) -> list[str]:
+    """Answer several (question, context) pairs with one Gemini request.
+
+    Falls back to one request per question if the reply cannot be split.
+    """
+    if len(items) == 1:
+        return [await answer_from_context(items[0][1], items[0][0])]
+
+    blocks = "\n\n".join(
+        f"### Question {n}\nContext:\n{context}\n\nQuestion: {question}"
+        for n, (question, context) in enumerate(items, start=1)
     )
-    return response.text
+    prompt = f"""Answer each numbered question using ONLY the context given with that question, do not include any personal opinions or information. If a question's context does not contain the answer, say you don't know for that question.
+    If there are [] in the document especially if they are highlighted and in bold, consider them as filler for dates or numbers or names.
+    Reply with a JSON array of {len(items)} strings, one answer per question, in order, and nothing else.
+
+{blocks}"""
+
+    reply = await llm.generate(prompt)
+    try:
+        text = reply.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+        answers = json.loads(text)
+        if isinstance(answers, list) and len(answers) == len(items):
+            return [str(a) for a in answers]
+    except ValueError:
+        pass
+    logger.warning("Could not split a packed answer, answering the questions one by one")
+    return list(await asyncio.gather(*[answer_from_context(context, question) for question, context in items]))
+
+
+# --------------------------
+# Corpus Tools
+# --------------------------
+@mcp.tool()
+async def corpus_add_document(document: str, doc_id: str = "", metadata: dict | None = None) -> dict:
+    """Add a PDF to the persistent document corpus, or replace it if the doc_id already exists.
+
+    Args:
+        document (str): doc_handle returned by register_document, or a local path to the PDF file.
+        doc_id (str): Identifier for the document, defaults to the file name (or the handle).
+        metadata (dict): Optional metadata (e.g. {"type": "contract", "jurisdiction": "Texas"}) usable as query filters.
+
+    Returns:
+        dict: status, doc_id and number of chunks indexed.
+    """
+    try:
+        pdf_path, digest = await asyncio.to_thread(document_store.resolve, document)
+        source = document if document.startswith("doc-") else os.path.abspath(document)
+        doc_id = doc_id or os.path.splitext(os.path.basename(source))[0]
+        chunks, vectors = await tool_executor.run(pdf_chunks_and_vectors, pdf_path)
+        n = await asyncio.to_thread(
+            corpus.add_document, doc_id, chunks, vectors, {"source": source, "sha256": digest, **(metadata or {})}
+        )
+        return {"status": "success", "doc_id": doc_id, "chunks": n}
+    except Exception as e:
+        return {"status": "error", "error_message": str(e)}
+
+
+def pdf_chunks_and_vectors(pdf_path: str):
+    chunks, vectors = [], []
+    for chunk, vector in stream_pdf_chunks(pdf_path, SIMILARITY_THRESHOLD, CHUNK_EMBEDDING, embedding_engine):
+        chunks.append(chunk)
+        vectors.append(vector)
+    vectors = np.vstack(vectors) if vectors else np.zeros((0, embedding_engine.dimension), dtype=np.float32)
+    return chunks, vectors
+
+
+@mcp.tool()
+async def corpus_remove_document(doc_id: str) -> dict:
+    """Remove a document from the corpus by its doc_id."""
+    removed = await asyncio.to_thread(corpus.remove_document, doc_id)
+    if not removed:
+        return {"status": "error", "message": f"{doc_id} not found in corpus."}
+    return {"status": "success", "doc_id": doc_id, "chunks_removed": removed}
+
+
+@mcp.tool()
+def corpus_list_documents() -> dict:
+    """List the documents in the corpus with their chunk counts and metadata."""
+    return corpus.list_documents()
+
+
+@mcp.tool()
+async def corpus_query(question: str, doc_ids: list[str] | None = None, metadata_filter: dict | None = None, k: int = 5) -> str:
+    """
+    Answer a question using every document in the corpus, or only some of them.
+    Args:
+        question: Natural language question to ask.
+        doc_ids: Optional list of document ids to restrict the search to.
+        metadata_filter: Optional metadata to match, e.g. {"type": "policy"}; a list value matches any of its items.
+        k: Number of chunks to retrieve.
+    """
+    query_vector = await embedding_engine.aencode(question.replace("\n", " "))
+    results = await asyncio.to_thread(corpus.search, query_vector, k, doc_ids, metadata_filter)
+    context = "\n\n".join([f"({doc.metadata['doc_id']}) {cite(doc)}" for doc, _ in results])
+    return await answer_from_context(context, question)
+
+
+@mcp.tool()
+def rag_cache_stats() -> dict:
+    """Hit/miss counters and size of the rag_query answer cache."""
+    return answer_cache.stats()
+
+
+@mcp.tool()
+def server_metrics() -> dict:
+    """Worker pool queue depth, embedding batcher, answer cache and LLM gateway counters."""
+    return {
+        "worker_pool": tool_executor.stats(),
+        "embedding": embedding_engine.stats(),
+        "answer_cache": answer_cache.stats(),
+        "llm": llm.stats(),
+    }
+
+
+def seed_corpus() -> None:
+    """Load the prebuilt rag/faiss_index_google into an empty corpus so it is queryable."""
+    if corpus.docs or not os.path.isdir(PREBUILT_INDEX_DIR):
+        return
+    try:
+        db = FAISS.load_local(PREBUILT_INDEX_DIR, SharedEmbeddings(embedding_engine), allow_dangerous_deserialization=True)
+        corpus.import_langchain_faiss(db, "US_Employment_Contract_Template", {"type": "contract"})
+    except Exception as e:
+        logger.warning(f"Could not import prebuilt index {PREBUILT_INDEX_DIR}: {e}")
 
 
 # --------------------------
 # Run MCP Server
 # --------------------------
 if __name__ == "__main__":
+    seed_corpus()
     mcp.run(transport="streamable-http")
@@ -0,0 +1,392 @@
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from a2a.server.context import ServerCallContext
+from a2a.server.events import EventQueue, InMemoryQueueManager
+from a2a.server.tasks import PushNotificationConfigStore, TaskStore
+from a2a.types import (
+    PushNotificationConfig,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+)
+from a2a.utils import new_agent_text_message
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TASK_DB = os.getenv(
+    "A2A_TASK_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "state", "a2a_tasks.sqlite"),
+)
+# Finished tasks (and their artifacts) are dropped after this many seconds...
+DEFAULT_TASK_TTL = float(os.getenv("A2A_TASK_TTL", 24 * 3600))
+# ...or once more than this many finished tasks are stored, oldest first
+DEFAULT_MAX_TASKS = int(os.getenv("A2A_TASK_MAX", 10000))
+EVICT_INTERVAL = 60.0
+# "working" updates (one per streamed token) are written at most this often per store
+DEFAULT_WRITE_BEHIND = float(os.getenv("A2A_TASK_WRITE_BEHIND", 0.2))
+# How often a worker that does not run a task polls the store to follow it
+DEFAULT_FOLLOW_INTERVAL = float(os.getenv("A2A_TASK_FOLLOW_INTERVAL", 0.5))
+# Each store instance refreshes its heartbeat this often while watching...
+HEARTBEAT_INTERVAL = 5.0
+# ...and its unfinished tasks count as interrupted once the heartbeat is older than this
+DEFAULT_OWNER_TIMEOUT = float(os.getenv("A2A_TASK_OWNER_TIMEOUT", 30))
+
+TERMINAL_STATES = (TaskState.completed, TaskState.canceled, TaskState.failed, TaskState.rejected)
+_TERMINAL = tuple(s.value for s in TERMINAL_STATES)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    context_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    updated REAL NOT NULL,
+    data TEXT NOT NULL,
+    owner TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS tasks_finished ON tasks (state, updated);
+CREATE TABLE IF NOT EXISTS owners (
+    owner TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS push_configs (
+    task_id TEXT NOT NULL,
+    config_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (task_id, config_id)
+);
+"""
+# Columns added after the first version of the schema
+_MIGRATIONS = {
+    "owner": "ALTER TABLE tasks ADD COLUMN owner TEXT",
+    "cancel_requested": "ALTER TABLE tasks ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0",
+}
+
+_TERMINAL_MARKS = ",".join("?" * len(_TERMINAL))
+# A late write of an unfinished state never overwrites a finished task
+# The first writer (the worker running the task) stays its owner
+_UPSERT = f"""
+INSERT INTO tasks (id, context_id, state, updated, data, owner) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    context_id = excluded.context_id, state = excluded.state, updated = excluded.updated, data = excluded.data
+WHERE tasks.state NOT IN ({_TERMINAL_MARKS}) OR excluded.state IN ({_TERMINAL_MARKS})
+"""
+
+
+class SqliteTaskStore(TaskStore):
+    """A2A task store in a local SQLite file, with eviction of finished tasks.
+
+    Tasks are stored as JSON and survive restarts, so status queries keep
+    working. Finished tasks (completed, canceled, failed, rejected) are
+    deleted once older than `ttl`, and the oldest are deleted when more
+    than `max_tasks` of them are stored. Eviction runs at most once every
+    EVICT_INTERVAL seconds, piggybacked on `save`. The database uses WAL
+    mode, so several server processes can share one file.
+
+    Streaming sends a "working" status update per token; those saves are
+    buffered and written together every `write_behind` seconds. Every other
+    state is written immediately.
+
+    Each instance has an `owner` id, recorded on the tasks it creates. Its
+    `watch` loop keeps a heartbeat for that owner and picks up cancel
+    requests other workers record with `request_cancel`, so a task can be
+    cancelled from any worker. Unfinished tasks whose owner stopped beating
+    are marked failed by `fail_interrupted`.
+
+    Args:
+        path (str): SQLite database file.
+        ttl (float): Seconds a finished task is kept (0 keeps them forever).
+        max_tasks (int): Finished tasks kept at most (0 for no limit).
+        write_behind (float): Delay for buffered "working" saves (0 writes each one).
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_TASK_DB,
+        ttl: float = DEFAULT_TASK_TTL,
+        max_tasks: int = DEFAULT_MAX_TASKS,
+        write_behind: float = DEFAULT_WRITE_BEHIND,
+    ):
+        self.path = os.path.abspath(path)
+        self.ttl = ttl
+        self.max_tasks = max_tasks
+        self.write_behind = write_behind
+        self._pending: dict[str, Task] = {}
+        self._flusher: asyncio.Task | None = None
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+        for column, sql in _MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(sql)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._last_evict = 0.0
+        self.evicted = 0
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+    def _execute(self, sql: str, params=()) -> list:
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _write(self, tasks) -> None:
+        now = time.time()
+        rows = [
+            (t.id, t.context_id, TaskState(t.status.state).value, now, t.model_dump_json(), self.owner, *_TERMINAL, *_TERMINAL)
+            for t in tasks
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(_UPSERT, rows)
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        if self.write_behind > 0 and TaskState(task.status.state) == TaskState.working:
+            self._pending[task.id] = task
+            if self._flusher is None or self._flusher.done():
+                self._flusher = asyncio.create_task(self._flush_later())
+            return
+
+        self._pending.pop(task.id, None)
+        await asyncio.to_thread(self._write, [task])
+        if time.monotonic() - self._last_evict > EVICT_INTERVAL:
+            self._last_evict = time.monotonic()
+            await asyncio.to_thread(self.evict)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.write_behind)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write buffered "working" updates now."""
+        batch, self._pending = list(self._pending.values()), {}
+        if batch:
+            await asyncio.to_thread(self._write, batch)
+
+    async def get(self, task_id: str, context: ServerCallContext | None = None) -> Task | None:
+        if task_id in self._pending:
+            return self._pending[task_id]
+        rows = await asyncio.to_thread(self._execute, "SELECT data FROM tasks WHERE id = ?", (task_id,))
+        return Task.model_validate_json(rows[0][0]) if rows else None
+
+    async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+        self._pending.pop(task_id, None)
+        await asyncio.to_thread(self._execute, "DELETE FROM tasks WHERE id = ?", (task_id,))
+        await asyncio.to_thread(self._execute, "DELETE FROM push_configs WHERE task_id = ?", (task_id,))
+
+    def evict(self) -> int:
+        """Delete expired and surplus finished tasks; returns how many were removed."""
+        removed = 0
+        with self._lock, self._conn:
+            if self.ttl > 0:
+                removed += self._conn.execute(
+                    f"DELETE FROM tasks WHERE state IN ({_TERMINAL_MARKS}) AND updated < ?", (*_TERMINAL, time.time() - self.ttl)
+                ).rowcount
+            if self.max_tasks > 0:
+                removed += self._conn.execute(
+                    f"""DELETE FROM tasks WHERE id IN (
+                        SELECT id FROM tasks WHERE state IN ({_TERMINAL_MARKS}) ORDER BY updated DESC LIMIT -1 OFFSET ?
+                    )""",
+                    (*_TERMINAL, self.max_tasks),
+                ).rowcount
+            if removed:
+                self._conn.execute("DELETE FROM push_configs WHERE task_id NOT IN (SELECT id FROM tasks)")
+        if removed:
+            self.evicted += removed
+            logger.info(f"Evicted {removed} finished tasks from {self.path}")
+        return removed
+
+    def heartbeat(self) -> None:
+        self._execute(
+            "INSERT INTO owners (owner, heartbeat) VALUES (?, ?) ON CONFLICT(owner) DO UPDATE SET heartbeat = excluded.heartbeat",
+            (self.owner, time.time()),
+        )
+
+    def fail_interrupted(self, owner_timeout: float = DEFAULT_OWNER_TIMEOUT) -> int:
+        """Mark unfinished tasks whose owner is gone as failed.
+
+        A task's owner is gone when its heartbeat is older than
+        `owner_timeout` (or it never had one), e.g. a previous server run.
+        Tasks of other live instances sharing the database are left alone.
+        Called at startup and periodically by `watch`; otherwise clients
+        polling those tasks would wait forever.
+        """
+        cutoff = time.time() - owner_timeout
+        self._execute("DELETE FROM owners WHERE heartbeat < ?", (cutoff,))
+        rows = self._execute(
+            f"""SELECT data FROM tasks WHERE state NOT IN ({_TERMINAL_MARKS})
+                AND (owner IS NULL OR owner NOT IN (SELECT owner FROM owners))""",
+            _TERMINAL,
+        )
+        now = datetime.now(timezone.utc).isoformat()
+        for (data,) in rows:
+            task = Task.model_validate_json(data)
+            task.status = TaskStatus(
+                state=TaskState.failed,
+                message=new_agent_text_message("The server restarted before this task finished.", task.context_id, task.id),
+                timestamp=now,
+            )
+            self._execute(
+                "UPDATE tasks SET state = ?, updated = ?, data = ? WHERE id = ?",
+                (TaskState.failed.value, time.time(), task.model_dump_json(), task.id),
+            )
+        if rows:
+            logger.warning(f"Marked {len(rows)} interrupted tasks as failed")
+        return len(rows)
+
+    async def request_cancel(self, task_id: str) -> bool:
+        """Flag an unfinished task for cancellation by its owner; False if it is unknown or finished."""
+        def flag():
+            with self._lock, self._conn:
+                return self._conn.execute(
+                    f"UPDATE tasks SET cancel_requested = 1 WHERE id = ? AND state NOT IN ({_TERMINAL_MARKS})",
+                    (task_id, *_TERMINAL),
+                ).rowcount
+
+        return await asyncio.to_thread(flag) > 0
+
+    async def wait_finished(self, task_id: str, timeout: float, interval: float = DEFAULT_FOLLOW_INTERVAL) -> Task | None:
+        """The task once it reaches a final state, or None if that takes longer than `timeout`."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            task = await self.get(task_id)
+            if task is not None and TaskState(task.status.state) in TERMINAL_STATES:
+                return task
+            await asyncio.sleep(interval)
+        return None
+
+    async def watch(self, on_cancel, interval: float = DEFAULT_FOLLOW_INTERVAL) -> None:
+        """Run until cancelled: keep this owner's heartbeat and pass cancel requests to `on_cancel`.
+
+        `on_cancel(task_id)` is awaited once for each of this owner's
+        unfinished tasks flagged by `request_cancel`.
+        """
+        handled: set[str] = set()
+        last_beat = last_reap = 0.0
+        while True:
+            try:
+                now = time.monotonic()
+                if now - last_beat >= HEARTBEAT_INTERVAL:
+                    await asyncio.to_thread(self.heartbeat)
+                    last_beat = now
+                if now - last_reap >= EVICT_INTERVAL:
+                    await asyncio.to_thread(self.fail_interrupted)
+                    last_reap = now
+                rows = await asyncio.to_thread(
+                    self._execute,
+                    f"SELECT id FROM tasks WHERE owner = ? AND cancel_requested = 1 AND state NOT IN ({_TERMINAL_MARKS})",
+                    (self.owner, *_TERMINAL),
+                )
+                flagged = {task_id for (task_id,) in rows}
+                for task_id in flagged - handled:
+                    logger.info(f"Cancel of task {task_id} requested by another worker")
+                    await on_cancel(task_id)
+                handled = flagged
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Task store watch failed ({e!r}), retrying")
+            await asyncio.sleep(interval)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SqlitePushNotificationConfigStore(PushNotificationConfigStore):
+    """Push notification configs kept in the SqliteTaskStore's database.
+
+    Every worker sharing the file sees the configs set through any of them,
+    so the worker running a task notifies the URLs a client registered
+    elsewhere, and the configs survive restarts. They are deleted along
+    with their task when it is evicted.
+    """
+
+    def __init__(self, task_store: SqliteTaskStore):
+        self.task_store = task_store
+
+    async def set_info(self, task_id: str, notification_config: PushNotificationConfig) -> None:
+        if notification_config.id is None:
+            notification_config.id = task_id
+        await asyncio.to_thread(
+            self.task_store._execute,
+            "INSERT OR REPLACE INTO push_configs (task_id, config_id, data) VALUES (?, ?, ?)",
+            (task_id, notification_config.id, notification_config.model_dump_json()),
+        )
+
+    async def get_info(self, task_id: str) -> list[PushNotificationConfig]:
+        rows = await asyncio.to_thread(
+            self.task_store._execute, "SELECT data FROM push_configs WHERE task_id = ? ORDER BY rowid", (task_id,)
+        )
+        return [PushNotificationConfig.model_validate_json(data) for (data,) in rows]
+
+    async def delete_info(self, task_id: str, config_id: str | None = None) -> None:
+        await asyncio.to_thread(
+            self.task_store._execute,
+            "DELETE FROM push_configs WHERE task_id = ? AND config_id = ?",
+            (task_id, task_id if config_id is None else config_id),
+        )
+
+
+class StoreBackedQueueManager(InMemoryQueueManager):
+    """Queue manager that can follow tasks running in another server process.
+
+    Tasks started here are served from the in-memory queues as usual. When a
+    resubscribe (or cancel) arrives for a task this process does not run, the
+    task is followed through the shared task store instead: the store is
+    polled every `interval` seconds, and status changes and new artifacts are
+    replayed as events until the task finishes or the queue is closed.
+    """
+
+    def __init__(self, task_store: TaskStore, interval: float = DEFAULT_FOLLOW_INTERVAL):
+        super().__init__()
+        self.task_store = task_store
+        self.interval = interval
+
+    async def tap(self, task_id: str) -> EventQueue | None:
+        queue = await super().tap(task_id)
+        if queue is not None:
+            return queue
+        task = await self.task_store.get(task_id)
+        if task is None or TaskState(task.status.state) in TERMINAL_STATES:
+            return None
+        queue = EventQueue()
+        asyncio.create_task(self._follow(task, queue))
+        return queue
+
+    async def _follow(self, task: Task, queue: EventQueue) -> None:
+        status = task.status.model_dump_json()
+        sent_artifacts = {a.artifact_id: a.model_dump_json() for a in task.artifacts or []}
+        try:
+            while not queue.is_closed():
+                await asyncio.sleep(self.interval)
+                task = await self.task_store.get(task.id)
+                if task is None:
+                    return
+                for artifact in task.artifacts or []:
+                    if sent_artifacts.get(artifact.artifact_id) != artifact.model_dump_json():
+                        sent_artifacts[artifact.artifact_id] = artifact.model_dump_json()
+                        await queue.enqueue_event(
+                            TaskArtifactUpdateEvent(task_id=task.id, context_id=task.context_id, artifact=artifact)
+                        )
+                finished = TaskState(task.status.state) in TERMINAL_STATES
+                if task.status.model_dump_json() != status:
+                    status = task.status.model_dump_json()
+                    await queue.enqueue_event(
+                        TaskStatusUpdateEvent(task_id=task.id, context_id=task.context_id, status=task.status, final=finished)
+                    )
+                if finished:
+                    return
+        finally:
+            await queue.close()
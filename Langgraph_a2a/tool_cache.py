@@ -0,0 +1,83 @@
+import json
+import logging
+import os
+import time
+from collections import OrderedDict, defaultdict
+
+from tracing import record_span
+
+logger = logging.getLogger(__name__)
+
+# Deterministic tools whose results depend only on their arguments
+DEFAULT_PURE_TOOLS = tuple(
+    t.strip()
+    for t in os.getenv("MCP_PURE_TOOLS", "add_days_to_date,jurisdiction_checker,policy_comparator").split(",")
+    if t.strip()
+)
+DEFAULT_TTL = float(os.getenv("MCP_TOOL_CACHE_TTL", 3600))
+DEFAULT_MAX_ENTRIES = int(os.getenv("MCP_TOOL_CACHE_MAX_ENTRIES", 1024))
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("MCP_TOOL_TIMEOUT", 30))
+# Per-tool overrides, e.g. MCP_TOOL_TIMEOUTS='{"rag_query": 180}'
+DEFAULT_TOOL_TIMEOUTS = {"rag_query": 180.0, "rag_query_batch": 600.0, "corpus_add_document": 600.0}
+DEFAULT_TOOL_TIMEOUTS.update(json.loads(os.getenv("MCP_TOOL_TIMEOUTS", "{}")))
+
+OUTCOMES = ("hit", "miss", "call", "timeout", "error")
+
+
+class ToolResultCache:
+    """LRU/TTL memo of pure tool results, keyed by tool name and canonical arguments.
+
+    Only successful results are stored. Every call through the pool is
+    counted per tool as a "hit" or "miss" (pure tools), "call" (other tools),
+    "timeout" or "error".
+
+    Args:
+        pure_tools: Names of tools whose results may be cached.
+        ttl (float): Seconds a result stays valid.
+        max_entries (int): Results kept before the least recently used is dropped.
+    """
+
+    def __init__(self, pure_tools=DEFAULT_PURE_TOOLS, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.pure_tools = set(pure_tools)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()  # key -> (created, result)
+        self.counts = defaultdict(lambda: dict.fromkeys(OUTCOMES, 0))
+
+    def is_pure(self, name: str) -> bool:
+        return name in self.pure_tools
+
+    @staticmethod
+    def key(name: str, arguments: dict) -> str:
+        return json.dumps([name, arguments], sort_keys=True, default=str)
+
+    def get(self, name: str, arguments: dict):
+        """Cached result, or None on a miss (expired entries are dropped)."""
+        key = self.key(name, arguments)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created, result = entry
+        if time.monotonic() - created > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, name: str, arguments: dict, result) -> None:
+        key = self.key(name, arguments)
+        self._entries[key] = (time.monotonic(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def record(self, name: str, outcome: str, elapsed_ms: float) -> None:
+        self.counts[name][outcome] += 1
+        logger.info(f"MCP tool {name}: {outcome} in {elapsed_ms:.1f} ms")
+        record_span("mcp", elapsed_ms, tool=name, outcome=outcome)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "tools": {name: dict(c) for name, c in self.counts.items()}}
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,31 @@
+# Shared by both services: adk_agent/tracing.py loads this file and re-exports its helpers.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# When set, every hop appends one JSON line per call here (read by benchmarks/e2e_benchmark.py)
+TRACE_FILE = os.getenv("BENCH_TRACE_FILE")
+_lock = threading.Lock()
+
+
+def record_span(hop: str, ms: float, **attrs) -> None:
+    """Append a timing record for one hop; a no-op unless BENCH_TRACE_FILE is set."""
+    if not TRACE_FILE:
+        return
+    line = json.dumps({"hop": hop, "ms": round(ms, 3), "t": time.time(), "pid": os.getpid(), **attrs})
+    with _lock, open(TRACE_FILE, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+@contextmanager
+def span(hop: str, **attrs):
+    """Time the enclosed block as one `hop` record, marking whether it raised."""
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        record_span(hop, (time.perf_counter() - start) * 1000, ok=ok, **attrs)
@@ -0,0 +1,73 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+DEFAULT_KIND = os.getenv("MCP_WORKER_KIND", "thread")
+DEFAULT_MAX_WORKERS = int(os.getenv("MCP_MAX_WORKERS", min(8, os.cpu_count() or 1)))
+
+
+class ToolExecutor:
+    """Runs blocking tool work off the MCP server's event loop.
+
+    Heavy tool bodies (PDF parsing, chunking, embedding, docx generation) are
+    awaited through `run`, so cheap tools keep being served while they run.
+    With kind="process", functions and their arguments must be picklable and
+    defined at module level.
+
+    Args:
+        kind (str): "thread" or "process".
+        max_workers (int): Pool size.
+    """
+
+    def __init__(self, kind: str = DEFAULT_KIND, max_workers: int = DEFAULT_MAX_WORKERS):
+        if kind == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp-tool")
+        elif kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            raise ValueError(f"kind must be 'thread' or 'process', got {kind!r}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+
+    async def run(self, fn, *args, **kwargs):
+        """Run `fn(*args, **kwargs)` in the pool and await its result."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.submitted += 1
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self.completed += 1
+                self.failed += 0 if ok else 1
+                self.total_seconds += time.perf_counter() - start
+
+    def stats(self) -> dict:
+        """Pool size, queue depth and throughput counters."""
+        with self._lock:
+            pending = self.submitted - self.completed
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "running": min(pending, self.max_workers),
+                "queued": max(pending - self.max_workers, 0),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_ms": self.total_seconds / self.completed * 1000 if self.completed else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,10 +1,39 @@
-from google.adk.agents import LlmAgent, Agent
-from google.adk.tools import google_search
+from google.adk.agents import LlmAgent, Agent, ParallelAgent, SequentialAgent
 from google.adk.tools import agent_tool
 
 import os
 from langfuse import Langfuse
 
+try:
+    from .router import fast_path_callback
+    from .search_cache import record_grounding_queries, remember_search_results, reuse_search_results, search_tool
+    from .tracing import span
+    from .workflow import ConditionalAgent, LabelRouter, TemplateFormatter, context_is_thin
+except ImportError:
+    from router import fast_path_callback
+    from search_cache import record_grounding_queries, remember_search_results, reuse_search_results, search_tool
+    from tracing import span
+    from workflow import ConditionalAgent, LabelRouter, TemplateFormatter, context_is_thin
+
+# "agents": LegalSDK_Agent coordinates its helpers through LLM transfers.
+# "workflow": a fixed sequential/parallel plan with fewer LLM calls (see build_sdk_workflow).
+SDK_MODE = os.getenv("ADK_SDK_MODE", "agents")
+
+
+def adk_model():
+    """Gemini model for an agent, or with ADK_MODEL_BACKEND=fake a scripted offline stand-in.
+
+    The stand-in's per-agent behaviour lives in fake_llm.SCRIPTS.
+    """
+    if os.getenv("ADK_MODEL_BACKEND") != "fake":
+        return "gemini-2.0-flash"
+    try:
+        from .fake_llm import FakeAdkLlm
+    except ImportError:
+        from fake_llm import FakeAdkLlm
+    return FakeAdkLlm()
+
+
 langfuse_client = Langfuse(
     public_key="pk-lf-2c86bd4d-6849-46a5-972f-31336b95e4a3",
     secret_key="sk-lf-f971db31-4f49-4954-bd34-e098a70cf94c",
@@ -12,25 +41,29 @@ langfuse_client = Langfuse(
 )
 
 SearchAgent = LlmAgent(
-    model="gemini-2.0-flash",
+    model=adk_model(),
     name="SearchAgent",
     description="Searches the web when context is inadequate.",
     instruction="""
 You are a focused web search specialist.
-- Use the google_search tool to retrieve up-to-date, relevant legal information.
+- Use the search tool to retrieve up-to-date, relevant legal information.
 - Return a concise bundle of the most pertinent snippets with source titles and URLs.
 - Prefer primary sources (statutes, regs, court opinions) and reputable secondary sources.
 Output format:
 - 'sources': bullet list with title and URL.
 - 'snippets': short, high-signal quotes or paraphrases.
 """,
-    tools=[google_search],
+    tools=[search_tool()],  # google_search, or the offline stand-in with SEARCH_BACKEND=local
     output_key="search_results",  # results placed into state["search_results"]
+    # Earlier results for the same search request (this session or the shared cache) skip the search
+    before_agent_callback=reuse_search_results,
+    after_agent_callback=remember_search_results,
+    after_model_callback=record_grounding_queries,
 )
 
 
 AnalyzerAgent = LlmAgent(
-    model="gemini-2.0-flash",
+    model=adk_model(),
     name="LegalAnalyzer",
     description="Classifies the user's request and proposes routing.",
     instruction="""
@@ -63,7 +96,7 @@ Guidance:
 
 
 SummarizerAgent = LlmAgent(
-    model="gemini-2.0-flash",
+    model=adk_model(),
     name="LegalSummarizer",
     description="Summarizes legal documents in plain English.",
     instruction="""
@@ -93,7 +126,7 @@ Set the final summary text into state["summary"].
 
 
 ClauseDrafterAgent = LlmAgent(
-    model="gemini-2.0-flash",
+    model=adk_model(),
     name="ClauseDrafter",
     description="Drafts enforceable clauses tailored to the user's scenario.",
     instruction="""
@@ -125,7 +158,7 @@ Write final drafted text into state["drafted_clauses"].
 )
 
 ComplianceAgent = LlmAgent(
-    model="gemini-2.0-flash",
+    model=adk_model(),
     name="ComplianceCiter",
     description="Validates drafts, flags issues, and attaches citations.",
     instruction="""
@@ -154,7 +187,7 @@ Write your full compliance-checked output into state["compliance_checked"].
 )
 
 FormatterAgent = LlmAgent(
-    model="gemini-2.0-flash",
+    model=adk_model(),
     name="LegalFormatter",
     description="Assembles the final response (summary or clauses + compliance) into polished output.",
     instruction="""
@@ -181,7 +214,7 @@ Write the final text into state["final_answer"].
 
 LegalSDK_Agent = LlmAgent(
     name="LegalSDK_Agent",
-    model="gemini-2.0-flash",
+    model=adk_model(),
     description="SDK-internal multi-agent legal assistant with web-search fallback.",
     instruction="""
 You are the coordinator for the SDK-internal legal graph.
@@ -219,6 +252,134 @@ for helper in [SummarizerAgent, ClauseDrafterAgent, ComplianceAgent]:
     helper.sub_agents = [FormatterAgent, SearchAgent]
 
 
+def build_sdk_workflow():
+    """LegalSDK_Agent as a fixed workflow instead of LLM-driven transfers.
+
+    1) The analyzer runs in parallel with a web search (skipped when the
+       request came with substantial context, see stream_events).
+    2) The label picks the next step: the summarizer, the drafter and the
+       compliance citer in parallel, or the compliance citer alone.
+    3) The final answer is filled into a template; the LLM formatter only
+       runs when the label or the step output is missing.
+
+    The helpers work from state and never transfer or search themselves,
+    so a request makes 3 to 4 LLM calls instead of 4 to 8 chained ones.
+    """
+    analyzer = LlmAgent(
+        model=adk_model(),
+        name="WorkflowAnalyzer",
+        description=AnalyzerAgent.description,
+        instruction="""
+Classify the user request into EXACTLY ONE of:
+- SUMMARIZE: the user asks to explain/summarize a document.
+- DRAFT_CLAUSE: the user asks to draft/propose clauses.
+- COMPLIANCE_CHECK: the user provides text to review/validate/cite.
+
+Reply with ONLY a JSON object, no code fences:
+{"label": "<SUMMARIZE|DRAFT_CLAUSE|COMPLIANCE_CHECK>", "needs_context": <true|false>, "notes": "one brief sentence"}
+""",
+        output_key="task_label_json",
+    )
+    search = ConditionalAgent(
+        name="SearchWhenContextThin",
+        condition=context_is_thin,
+        sub_agents=[
+            LlmAgent(
+                model=adk_model(),
+                name="WorkflowSearch",
+                description=SearchAgent.description,
+                instruction=SearchAgent.instruction,
+                tools=[search_tool()],
+                output_key="search_results",
+                before_agent_callback=reuse_search_results,
+                after_agent_callback=remember_search_results,
+                after_model_callback=record_grounding_queries,
+            )
+        ],
+    )
+    grounding = """
+Inputs:
+- User request: {user_query?}
+- Provided context: {context?}
+- Web search results: {search_results?}
+Never fabricate citations; only cite sources listed above.
+"""
+    summarizer = LlmAgent(
+        model=adk_model(),
+        name="WorkflowSummarizer",
+        description=SummarizerAgent.description,
+        instruction="""
+You summarize legal text clearly and faithfully.
+Output a structured summary with headings and bullet points, in a neutral, non-speculative tone,
+and a short "Citations & Sources" section.
+""" + grounding,
+        output_key="summary",
+    )
+    drafter = LlmAgent(
+        model=adk_model(),
+        name="WorkflowDrafter",
+        description=ClauseDrafterAgent.description,
+        instruction="""
+You draft clear, enforceable legal clauses tailored to the user's scenario.
+- Provide clauses with labels and short rationales.
+- Parameterize where appropriate (e.g., [TERM_YEARS], [GOVERNING_LAW]); mark jurisdiction placeholders if unspecified.
+- Add a brief "Assumptions & Variations" section.
+""" + grounding,
+        output_key="drafted_clauses",
+    )
+
+    def compliance_citer(name: str) -> LlmAgent:
+        return LlmAgent(
+            model=adk_model(),
+            name=name,
+            description=ComplianceAgent.description,
+            instruction="""
+You check legal text, or the requirements a requested draft must meet, for compliance.
+Output a "Compliance Report" with Issues, Risk Level (Low/Med/High) and Fixes,
+and a "Cited Authorities" section, preferring statutes, regulations and case law.
+If the user provided a draft, add a "Revised Draft" reflecting the fixes.
+""" + grounding,
+            output_key="compliance_checked",
+        )
+
+    route = LabelRouter(
+        name="RouteByLabel",
+        branches={
+            "SUMMARIZE": "WorkflowSummarizer",
+            "DRAFT_CLAUSE": "DraftWithCitations",
+            "COMPLIANCE_CHECK": "WorkflowComplianceCiter",
+        },
+        default="WorkflowSummarizer",
+        sub_agents=[
+            summarizer,
+            ParallelAgent(name="DraftWithCitations", sub_agents=[drafter, compliance_citer("WorkflowDraftCiter")]),
+            compliance_citer("WorkflowComplianceCiter"),
+        ],
+    )
+    formatter = TemplateFormatter(
+        name="WorkflowFormatter",
+        sub_agents=[
+            LlmAgent(
+                model=adk_model(),
+                name="WorkflowLLMFormatter",
+                description=FormatterAgent.description,
+                instruction=FormatterAgent.instruction,
+                output_key="final_answer",
+            )
+        ],
+    )
+    return SequentialAgent(
+        # Same name as the LLM coordinator, so the orchestrator can call either
+        name="LegalSDK_Agent",
+        description=LegalSDK_Agent.description,
+        sub_agents=[
+            ParallelAgent(name="AnalyzeAndSearch", sub_agents=[analyzer, search]),
+            route,
+            formatter,
+        ],
+    )
+
+
 from google.adk.agents.remote_a2a_agent import RemoteA2aAgent
 from google.adk.tools.agent_tool import AgentTool
 
@@ -231,11 +392,11 @@ lang_agent = RemoteA2aAgent(
                 ", and (4) synthesizes a legal document and saves as a word document" 
                 "Format the input as a dictionary. before feeding it to the tools",
                 
-    agent_card="http://localhost:10001/.well-known/agent.json"
+    agent_card=os.getenv("A2A_AGENT_CARD_URL", "http://localhost:10001/.well-known/agent.json")
 )
 
 orchestrator_agent = LlmAgent(
-    model="gemini-2.0-flash",
+    model=adk_model(),
     name="adk_orchestrator_agent",
     instruction=("""""
         "ROLE: Orchestrator for a Legal Advisor workflow in ADK Web, You can never answer yourself to the question, always call one of your tools, but you have to choose which ones.\n"
@@ -277,9 +438,10 @@ orchestrator_agent = LlmAgent(
     and set data_summary.highlights = ["No internal legal documents available"].
     - plan must only be written by Yourself.
     - Always call on at least one of your tools (lang_agent or LegalSDK_Agent)"""),
-
+    # Date arithmetic, jurisdiction checks and formatting go straight to the MCP tool
+    before_agent_callback=fast_path_callback,
 )
-orchestrator_agent.sub_agents = [LegalSDK_Agent, lang_agent]
+orchestrator_agent.sub_agents = [build_sdk_workflow() if SDK_MODE == "workflow" else LegalSDK_Agent, lang_agent]
 root_agent = orchestrator_agent
 
 from google.adk.a2a.utils.agent_to_a2a import to_a2a
@@ -289,59 +451,129 @@ a2a_app = to_a2a(root_agent, port=10001)
 from google.genai import types
 from google.adk.sessions import InMemorySessionService
 from google.adk.runners import Runner
+from google.adk.agents.run_config import RunConfig, StreamingMode
 
 from dotenv import load_dotenv
 load_dotenv()
 import asyncio
-async def Runners(query : str):
-    APP_NAME = "legal reviewer"
-    root_agent = orchestrator_agent
-    SESSION_CONFIG = {
-        "user_id": "12345",
-        "session_id": "123344"
-    }
-    USER_ID = "12345"
-    SESSION_ID = "123344"
-
-    # Session and Runner
-    session_service = InMemorySessionService()
-    session = await session_service.create_session(
-        app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID
-    )
-    runner = Runner(
-        agent=orchestrator_agent, app_name=APP_NAME, session_service=session_service
-    )
+import time
 
+APP_NAME = "legal reviewer"
+DEFAULT_USER_ID = "12345"
+# Sessions not used for this many seconds are deleted
+SESSION_TTL = float(os.getenv("ADK_SESSION_TTL", 3600))
 
+# One runner and session service per process, shared by every request
+session_service = InMemorySessionService()
+runner = Runner(
+    agent=orchestrator_agent, app_name=APP_NAME, session_service=session_service
+)
+_session_locks: dict[tuple[str, str], asyncio.Lock] = {}
+_last_used: dict[tuple[str, str], float] = {}
+
+
+async def expire_sessions() -> int:
+    """Delete sessions idle for longer than SESSION_TTL; returns how many were removed."""
+    cutoff = time.monotonic() - SESSION_TTL
+    expired = [
+        key for key, used in _last_used.items()
+        if used < cutoff and not _session_locks[key].locked()
+    ]
+    for user_id, session_id in expired:
+        await session_service.delete_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+        del _last_used[(user_id, session_id)], _session_locks[(user_id, session_id)]
+    return len(expired)
+
+
+async def stream_events(
+    query: str, session_id: str | None = None, user_id: str = DEFAULT_USER_ID, partial: bool = False, context: str = ""
+):
+    """Run one turn of the orchestrator on the shared runner, yielding its progress as it happens.
+
+    Without `session_id` the query gets a fresh session. Pass the returned
+    session_id back to continue that conversation; an unknown id starts a
+    new session under that id. Turns of one session run one at a time,
+    different sessions run concurrently. `context` is legal text sent along
+    with this turn (state["context"]); with enough of it the workflow skips
+    its web search.
+
+    Yields dicts with a "type" of:
+        session: {"session_id"}, first.
+        transfer: {"agent", "to"} when an agent hands over to another.
+        tool_call / tool_result: {"agent", "name"}.
+        text: {"agent", "text", "partial"}; partial chunks only with `partial=True`.
+        final: {"answer", "session_id"}, last.
+    """
+    await expire_sessions()
+    initial_state = {"user_query": query, "context": context}
+    session = None
+    if session_id is None:
+        session = await session_service.create_session(app_name=APP_NAME, user_id=user_id, state=initial_state)
+        session_id = session.id
+    key = (user_id, session_id)
+    lock = _session_locks.setdefault(key, asyncio.Lock())
+    _last_used[key] = time.monotonic()
+    yield {"type": "session", "session_id": session_id}
 
     new_message = types.Content(
         role="user", parts=[types.Part(text=query)]
     )
-
-    session.state["user_query"] = query
-    session.state["context"] = ""
-
-    
-    async for event in runner.run_async(
-        user_id=USER_ID,
-        session_id=SESSION_ID, 
-        new_message=new_message,
-    ):
-        final_response = ""
-        if event.is_final_response():
-            if event.content and event.content.parts:
-                final_response += event.content.parts[0].text
-                session.state["final_answer"] = final_response
-
-
-
-    print(final_response)
-    return {"answer": final_response} 
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE if partial else StreamingMode.NONE)
+
+    final_response = ""
+    # Held from the session lookup on, so concurrent first turns of a new session_id create it once
+    async with lock:
+        if session is None:
+            session = await session_service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+        if session is None:
+            session = await session_service.create_session(
+                app_name=APP_NAME, user_id=user_id, session_id=session_id, state=initial_state,
+            )
+        with span("adk"):
+            async for event in runner.run_async(
+                user_id=user_id,
+                session_id=session.id,
+                new_message=new_message,
+                state_delta={"user_query": query, "context": context},
+                run_config=run_config,
+            ):
+                for call in event.get_function_calls():
+                    if call.name != "transfer_to_agent":
+                        yield {"type": "tool_call", "agent": event.author, "name": call.name}
+                for response in event.get_function_responses():
+                    if response.name != "transfer_to_agent":
+                        yield {"type": "tool_result", "agent": event.author, "name": response.name}
+                if event.actions and event.actions.transfer_to_agent:
+                    yield {"type": "transfer", "agent": event.author, "to": event.actions.transfer_to_agent}
+
+                parts = event.content.parts if event.content and event.content.parts else []
+                text = "".join(part.text for part in parts if part.text)
+                if event.partial:
+                    if text:
+                        yield {"type": "text", "agent": event.author, "text": text, "partial": True}
+                elif event.is_final_response() and parts:
+                    final_response = parts[0].text or ""
+                    yield {"type": "text", "agent": event.author, "text": text, "partial": False}
+    _last_used[key] = time.monotonic()
+
+    yield {"type": "final", "answer": final_response, "session_id": session.id}
+
+
+async def Runners(query : str, session_id: str | None = None, user_id: str = DEFAULT_USER_ID, context: str = ""):
+    """Run one turn and return {"answer", "session_id"} once every agent is done; see stream_events."""
+    async for event in stream_events(query, session_id, user_id, context=context):
+        if event["type"] == "final":
+            result = {"answer": event["answer"], "session_id": event["session_id"]}
+    return result
 if __name__ == "__main__":    
+    session_id = None
     while True:
-        query = input("Enter query (or type 'exit' to quit): ")
+        query = input("Enter query (or type 'exit' to quit, 'new' for a new conversation): ")
         if query.lower() == "exit":
             break
-        asyncio.run(Runners(query))
-
-    
\ No newline at end of file
+        if query.lower() == "new":
+            session_id = None
+            continue
+        result = asyncio.run(Runners(query, session_id))
+        print(result["answer"])
+        session_id = result["session_id"]
@@ -1,36 +1,124 @@
 import asyncio
+import json
+import os
+import threading
 from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from agent import Runners  # your agent entrypoint
+from agent import DEFAULT_USER_ID, Runners, stream_events  # your agent entrypoint
+from tracing import span
 import httpx 
 import gradio as gr 
 
+API_URL = os.getenv("ADK_API_URL", "http://localhost:9090")
+
 app = FastAPI()
 
 class Prompt(BaseModel):
     text: str
+    # Return value of a previous /run call, to continue that conversation
+    session_id: str | None = None
+    user_id: str = DEFAULT_USER_ID
+    # Legal text to work from for this turn; enough of it skips the workflow's web search
+    context: str = ""
 
 @app.post("/run")
 async def run_agent_endpoint(prompt: Prompt):
     
-    return  await Runners(prompt.text)
-async def call_backend(prompt: str):
-    """Send the user prompt to FastAPI /run."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post("http://localhost:9090/run", json={"text": prompt})
-        return resp.json().get("answer", "No response")
-
-def gradio_wrapper(prompt: str):
-    
-    return asyncio.run(call_backend(prompt))
+    with span("fastapi"):
+        return  await Runners(prompt.text, prompt.session_id, prompt.user_id, prompt.context)
+
+
+@app.post("/run/stream")
+async def run_agent_stream_endpoint(prompt: Prompt):
+    """Same as /run, but sends each agent event as a server-sent event while the agents work."""
+
+    async def events():
+        try:
+            async for event in stream_events(prompt.text, prompt.session_id, prompt.user_id, partial=True, context=prompt.context):
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+# The Gradio callbacks run in worker threads; they share one HTTP client on one
+# long-lived event loop instead of opening a client and a loop per prompt.
+# Both are created on the first prompt, so serving or importing only the FastAPI app starts no thread.
+_loop = None
+_loop_lock = threading.Lock()
+_client = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="gradio-backend", daemon=True).start()
+    return _loop
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(base_url=API_URL, timeout=httpx.Timeout(None, connect=10))
+    return _client
+
+
+async def stream_backend(prompt: str, session_id: str | None = None):
+    """Send the user prompt to FastAPI /run/stream and yield the decoded events."""
+    async with _get_client().stream("POST", "/run/stream", json={"text": prompt, "session_id": session_id}) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if line.startswith("data: "):
+                yield json.loads(line[len("data: "):])
+
+
+def gradio_wrapper(prompt: str, session_id: str | None):
+    """Render the answer as it streams in; the session id keeps the conversation going."""
+    loop = _get_loop()
+    events = stream_backend(prompt, session_id)
+    steps, text, text_agent, last_partial = [], "", None, False
+    try:
+        while True:
+            try:
+                event = asyncio.run_coroutine_threadsafe(events.__anext__(), loop).result()
+            except StopAsyncIteration:
+                break
+            kind = event["type"]
+            if kind == "session":
+                session_id = event["session_id"]
+                continue
+            if kind == "transfer":
+                steps.append(f"→ {event['to']}")
+            elif kind == "tool_call":
+                steps.append(f"⚙ {event['agent']}: {event['name']}")
+            elif kind == "text":
+                # Partial chunks add up to the agent's message, which then arrives whole;
+                # a partial after a whole message starts the agent's next model turn
+                if event["partial"] and last_partial and event["agent"] == text_agent:
+                    text += event["text"]
+                else:
+                    text = event["text"]
+                text_agent, last_partial = event["agent"], event["partial"]
+            elif kind == "final":
+                text = event["answer"] or text
+            elif kind == "error":
+                text = f"Error: {event['error']}"
+            yield "\n".join(steps) + ("\n\n" if steps else "") + text, session_id
+    finally:
+        # Gradio drops the generator when the user stops or leaves; closing it ends the HTTP stream
+        asyncio.run_coroutine_threadsafe(events.aclose(), loop).result()
 
 iface = gr.Interface(
     fn=gradio_wrapper,
-    inputs="text",
-    outputs="text",
+    inputs=["text", gr.State()],
+    outputs=["text", gr.State()],
     title="Legal Reviewer"
 )
 
 
 if __name__ == "__main__":
-    iface.launch(server_port=7860) 
\ No newline at end of file
+    iface.launch(server_port=7860)
\ No newline at end of file
@@ -0,0 +1,81 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+from typing import AsyncGenerator
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+FAKE_LATENCY = float(os.getenv("ADK_FAKE_LATENCY", 0.05))
+
+# ADK puts this identity line into every agent's system instruction
+_AGENT_NAME = re.compile(r'Your internal name is "([^"]+)"')
+
+
+def _label(query: str) -> str:
+    label = "DRAFT_CLAUSE" if "draft" in query.lower() else "SUMMARIZE"
+    return json.dumps({"label": label, "needs_context": True, "notes": "Scripted offline label."})
+
+
+# Per agent name: "route" is the agent it transfers to (or a function of the
+# user text returning one), "reply" a function of the user text giving its
+# answer. Agents not listed answer with a deterministic text.
+SCRIPTS = {
+    "adk_orchestrator_agent": {"route": lambda query: "LegalSDK_Agent" if "draft" in query.lower() else "LegalAgent"},
+    "LegalSDK_Agent": {"route": "LegalAnalyzer"},
+    "LegalAnalyzer": {"route": "ClauseDrafter"},
+    "ClauseDrafter": {"route": "LegalFormatter"},
+    "WorkflowAnalyzer": {"reply": _label},
+}
+
+
+def latest_user_text(llm_request: LlmRequest) -> str:
+    """Text of the most recent real user message (ADK's "For context:" notes are skipped)."""
+    for content in reversed(llm_request.contents or []):
+        if content.role != "user":
+            continue
+        text = "".join(part.text or "" for part in content.parts or [])
+        if text and not text.startswith("For context:"):
+            return text
+    return ""
+
+
+def agent_name(llm_request: LlmRequest) -> str:
+    """Name of the agent making the request, read from its system instruction."""
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    match = _AGENT_NAME.search(str(instruction or ""))
+    return match.group(1) if match else ""
+
+
+class FakeAdkLlm(BaseLlm):
+    """Scripted offline stand-in for Gemini in the ADK agents (ADK_MODEL_BACKEND=fake).
+
+    The calling agent's entry in `scripts` (SCRIPTS by default) decides
+    what it does: transfer to its "route", answer with its "reply", or
+    otherwise answer with a deterministic text. Every call takes `latency`
+    seconds.
+    """
+
+    # A Gemini name, so built-in tools such as google_search still attach
+    model: str = "gemini-2.0-flash"
+    scripts: dict = SCRIPTS
+    latency: float = FAKE_LATENCY
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.sleep(self.latency)
+        query = latest_user_text(llm_request)
+        script = self.scripts.get(agent_name(llm_request), {})
+        route, reply = script.get("route"), script.get("reply")
+        target = route(query) if callable(route) else route
+        if target:
+            part = types.Part(function_call=types.FunctionCall(name="transfer_to_agent", args={"agent_name": target}))
+        elif reply is not None:
+            part = types.Part(text=reply(query))
+        else:
+            digest = hashlib.sha256(query.encode("utf-8")).hexdigest()[:12]
+            part = types.Part(text=f"[fake answer {digest}] {query[:200]}")
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
@@ -0,0 +1,273 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+from google.genai import types
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+try:
+    from .tracing import span
+except ImportError:
+    from tracing import span
+
+logger = logging.getLogger(__name__)
+
+MCP_URL = os.getenv("MCP_URL", "http://localhost:8080/mcp/")
+# FAST_PATH=0 sends every query through the agents
+FAST_PATH_ENABLED = os.getenv("FAST_PATH", "1") != "0"
+# Sentence-transformers model for the intent classifier, e.g. "all-MiniLM-L6-v2"; empty (the default) keeps the router to exact rules
+ROUTER_EMBEDDING_MODEL = os.getenv("ROUTER_EMBEDDING_MODEL", "")
+# Minimum cosine similarity to a labelled example for a classifier route
+ROUTER_THRESHOLD = float(os.getenv("ROUTER_THRESHOLD", 0.75))
+# ...and how far it must beat the best "other" example
+ROUTER_MARGIN = float(os.getenv("ROUTER_MARGIN", 0.1))
+ROUTER_TOOL_TIMEOUT = float(os.getenv("ROUTER_TOOL_TIMEOUT", 30))
+
+US_STATES = (
+    "Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado", "Connecticut", "Delaware",
+    "Florida", "Georgia", "Hawaii", "Idaho", "Illinois", "Indiana", "Iowa", "Kansas", "Kentucky",
+    "Louisiana", "Maine", "Maryland", "Massachusetts", "Michigan", "Minnesota", "Mississippi",
+    "Missouri", "Montana", "Nebraska", "Nevada", "New Hampshire", "New Jersey", "New Mexico",
+    "New York", "North Carolina", "North Dakota", "Ohio", "Oklahoma", "Oregon", "Pennsylvania",
+    "Rhode Island", "South Carolina", "South Dakota", "Tennessee", "Texas", "Utah", "Vermont",
+    "Virginia", "Washington", "West Virginia", "Wisconsin", "Wyoming",
+)
+# Longest first, so "West Virginia" is not read as "Virginia"
+_STATE_NAMES = "|".join(sorted(US_STATES, key=len, reverse=True))
+_STATE = re.compile(r"\b(" + _STATE_NAMES + r")\b", re.IGNORECASE)
+_DATE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+_DAYS = re.compile(r"\b(\d+)\s+days?\b", re.IGNORECASE)
+# Text to format follows the first colon or newline
+_FORMAT_CONTENT = re.compile(r"^[^:\n]*(?:word|docx|document)[^:\n]*[:\n]\s*(.+)$", re.IGNORECASE | re.DOTALL)
+
+# Whole-query patterns that are routed without consulting the classifier
+RULES = {
+    "date": re.compile(r"^\s*(?:add|plus)\s+\d+\s+days?\s+to\s+\d{4}-\d{2}-\d{2}\s*[.?!]?\s*$", re.IGNORECASE),
+    # Only a bare state name, so "Is this Texas non-compete valid?" still goes to the agents
+    "jurisdiction": re.compile(
+        r"^\s*is\s+(?:" + _STATE_NAMES + r")\s+(?:a\s+)?(?:supported|valid)(?:\s+jurisdiction)?\s*[.?!]?\s*$", re.IGNORECASE
+    ),
+    "format": re.compile(r"^\s*format\s+(?:this|the following)[^:\n]*(?:word|docx)\s+document\s*:", re.IGNORECASE),
+}
+
+# Labelled examples for the classifier; "other" is everything the agents should handle
+EXAMPLES = {
+    "date": [
+        "Add 45 days to 2025-08-01.",
+        "What date is 30 days after 2024-03-15?",
+        "If the notice is served on 2025-01-10, what is the date 60 days later?",
+        "Compute the deadline 90 days from 2023-11-01.",
+        "Which day falls 14 days after 2025-06-30?",
+    ],
+    "jurisdiction": [
+        "Is Texas supported?",
+        "Do you support California law?",
+        "Can you handle a case in New York?",
+        "Is Florida a valid jurisdiction for this tool?",
+        "Which jurisdictions are supported, is Ohio one of them?",
+    ],
+    "format": [
+        "Format this into a Word document: The Employee shall keep all information confidential.",
+        "Turn the following clauses into a docx file: 1. Term. 2. Termination.",
+        "Save this text as a legal Word document: This Agreement is governed by Texas law.",
+        "Put the following into a formatted legal docx: Confidentiality obligations survive termination.",
+    ],
+    "other": [
+        "How many sick days does the employee get according to contract.pdf?",
+        "Summarize the termination section of this agreement.",
+        "Draft a confidentiality clause for a software startup.",
+        "Is this non-compete clause enforceable in California?",
+        "Compare our leave policy with the Family and Medical Leave Act.",
+        "What notice period does the contract require before 2025-08-01?",
+        "Draft a governing law clause choosing Texas law and a 30 days cure period.",
+        "Check this clause for compliance and add citations.",
+    ],
+}
+
+
+@dataclass
+class Route:
+    """A routing decision: call `tool` with `arguments` instead of running the agents."""
+
+    intent: str
+    tool: str
+    arguments: dict = field(default_factory=dict)
+    confidence: float = 1.0
+    method: str = "rule"
+
+
+def extract(intent: str, query: str) -> tuple[str, dict] | None:
+    """MCP tool and arguments for `intent` if they can be read off the query, else None."""
+    if intent == "date":
+        dates, days = _DATE.findall(query), _DAYS.findall(query)
+        if len(dates) == 1 and len(days) == 1:
+            return "add_days_to_date", {"input_date": dates[0], "duration_days": days[0]}
+    elif intent == "jurisdiction":
+        states = {m.title() for m in _STATE.findall(query)}
+        if len(states) == 1:
+            return "jurisdiction_checker", {"jurisdiction": states.pop()}
+    elif intent == "format":
+        match = _FORMAT_CONTENT.match(query.strip())
+        if match and match.group(1).strip():
+            return "legal_doc_formatter", {"content": match.group(1).strip()}
+    return None
+
+
+class IntentClassifier:
+    """Nearest-example intent classifier over sentence embeddings of EXAMPLES.
+
+    The model is loaded and the examples embedded on first use, once even
+    when several router threads classify at the same time. Returns the best
+    intent, its similarity, and the best "other" similarity.
+    """
+
+    def __init__(self, model_name: str = ROUTER_EMBEDDING_MODEL, examples: dict = EXAMPLES):
+        self.model_name = model_name
+        self.examples = examples
+        self._model = None
+        self._labels: list[str] = []
+        self._vectors = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._model is not None:
+                return
+            from sentence_transformers import SentenceTransformer
+
+            model = SentenceTransformer(self.model_name)
+            self._labels = [label for label, texts in self.examples.items() for _ in texts]
+            texts = [text for texts in self.examples.values() for text in texts]
+            self._vectors = model.encode(texts, normalize_embeddings=True)
+            # Last, so other threads only see a model once the examples are embedded
+            self._model = model
+
+    def classify(self, query: str) -> tuple[str, float, float]:
+        if self._model is None:
+            self._load()
+        scores = self._vectors @ self._model.encode(query, normalize_embeddings=True)
+        best = {}
+        for label, score in zip(self._labels, scores):
+            best[label] = max(best.get(label, -1.0), float(score))
+        intent = max((label for label in best if label != "other"), key=best.get)
+        return intent, best[intent], best.get("other", -1.0)
+
+
+class FastPathRouter:
+    """Sends tool-shaped queries straight to the MCP tool, skipping the LLM agents.
+
+    A query matching one of RULES, with arguments that can be extracted, is
+    routed with confidence 1. Otherwise the classifier must pick an intent
+    whose arguments are present in the query, with a similarity of at least
+    `threshold` and `margin` above the closest "other" example. Anything
+    else returns None and goes through the agents. Every decision is logged
+    with its confidence so the thresholds can be tuned.
+
+    Args:
+        classifier (IntentClassifier): Embedding classifier, or None for rules only.
+        threshold (float): Minimum similarity for a classifier route.
+        margin (float): Minimum lead over the "other" examples.
+    """
+
+    def __init__(self, classifier: IntentClassifier | None = None, threshold: float = ROUTER_THRESHOLD, margin: float = ROUTER_MARGIN):
+        self.classifier = classifier
+        self.threshold = threshold
+        self.margin = margin
+
+    def route(self, query: str) -> Route | None:
+        for intent, rule in RULES.items():
+            if rule.match(query):
+                found = extract(intent, query)
+                if found:
+                    return self._log(query, Route(intent, *found))
+
+        if self.classifier is None:
+            return self._log(query, None)
+        try:
+            intent, confidence, other = self.classifier.classify(query)
+        except Exception as e:
+            logger.warning(f"Intent classifier unavailable ({e!r}); routing by rules only")
+            self.classifier = None
+            return self._log(query, None)
+        found = extract(intent, query)
+        decision = {"intent": intent, "confidence": round(confidence, 3), "other": round(other, 3)}
+        if found and confidence >= self.threshold and confidence - other >= self.margin:
+            return self._log(query, Route(intent, *found, confidence=confidence, method="classifier"))
+        return self._log(query, None, **decision)
+
+    def _log(self, query: str, route: Route | None, **details) -> Route | None:
+        if route is not None:
+            details = {"intent": route.intent, "confidence": round(route.confidence, 3), "method": route.method, "tool": route.tool}
+        logger.info(
+            f"Fast path {'taken' if route else 'skipped'}: "
+            f"{json.dumps({**details, 'threshold': self.threshold, 'query': query[:200]})}"
+        )
+        return route
+
+
+async def call_tool(name: str, arguments: dict, url: str = MCP_URL, timeout: float = ROUTER_TOOL_TIMEOUT) -> dict:
+    """Call one MCP tool and return its result as a dict."""
+    async def call():
+        async with streamablehttp_client(url) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                return await session.call_tool(name, arguments)
+
+    result = await asyncio.wait_for(call(), timeout)
+    if result.isError:
+        raise RuntimeError(" ".join(getattr(c, "text", "") for c in result.content))
+    if result.structuredContent:
+        return result.structuredContent.get("result", result.structuredContent)
+    return json.loads(result.content[0].text)
+
+
+def render(route: Route, result: dict) -> str | None:
+    """User-facing answer for a tool result, or None when the agents should take over."""
+    if route.tool == "add_days_to_date" and result.get("status") == "success":
+        args = route.arguments
+        return f"{args['duration_days']} days after {args['input_date']} is {result['result_date']}."
+    if route.tool == "jurisdiction_checker":
+        jurisdiction = route.arguments["jurisdiction"]
+        if result.get("status") == "success":
+            return f"{jurisdiction} is a supported jurisdiction."
+        return f"{jurisdiction} is not a supported jurisdiction."
+    if route.tool == "legal_doc_formatter" and result.get("status") == "success":
+        return f"The text was formatted as a legal Word document and saved to {result['file']}."
+    return None
+
+
+def default_router() -> FastPathRouter:
+    return FastPathRouter(IntentClassifier() if ROUTER_EMBEDDING_MODEL else None)
+
+
+router = default_router()
+
+
+async def fast_path_callback(callback_context) -> types.Content | None:
+    """before_agent_callback for the orchestrator: answer tool-shaped queries without running it.
+
+    Returning None lets the orchestrator run as usual, which is also what
+    happens when the router declines or the tool call fails.
+    """
+    if not FAST_PATH_ENABLED or callback_context.user_content is None:
+        return None
+    query = "".join(part.text or "" for part in callback_context.user_content.parts or [])
+    route = await asyncio.to_thread(router.route, query)
+    if route is None:
+        return None
+    try:
+        with span("fast_path", tool=route.tool, method=route.method):
+            answer = render(route, await call_tool(route.tool, route.arguments))
+    except Exception as e:
+        logger.warning(f"Fast path {route.tool} failed ({e!r}); falling back to the agents")
+        return None
+    if answer is None:
+        logger.info(f"Fast path {route.tool} gave no usable result; falling back to the agents")
+        return None
+    callback_context.state["final_answer"] = answer
+    return types.Content(role="model", parts=[types.Part(text=answer)])
@@ -0,0 +1,218 @@
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = float(os.getenv("SEARCH_CACHE_TTL", 6 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 512))
+# "google" uses Gemini's google_search tool, "local" the offline LocalSearch stand-in
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "google")
+LOCAL_SEARCH_CORPUS = os.getenv(
+    "SEARCH_LOCAL_CORPUS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_search_corpus.json"),
+)
+
+_WORD = re.compile(r"\w+")
+# Session state key, per search agent, for the queries its current run searched
+SEARCHED_QUERIES_KEY = "search:queries:{agent}"
+
+
+def normalize_query(query: str) -> str:
+    """Lowercased words of the query, so case, punctuation and spacing do not split cache entries."""
+    return " ".join(_WORD.findall(query.lower()))
+
+
+class SearchResultCache:
+    """LRU/TTL cache of search result bundles, keyed by normalized search request.
+
+    One instance per process is shared by every helper and session, so a
+    statute looked up while drafting is not searched again when citing, nor
+    for the next user asking the same thing.
+
+    Args:
+        ttl (float): Seconds a bundle stays valid.
+        max_entries (int): Bundles kept before the least recently used is dropped.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()  # normalized query -> (created, bundle)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query: str) -> str | None:
+        key = normalize_query(query)
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, query: str, bundle: str) -> None:
+        key = normalize_query(query)
+        if not key or not bundle:
+            return
+        self._entries[key] = (time.monotonic(), bundle)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+search_cache = SearchResultCache()
+
+
+class LocalSearch:
+    """Offline stand-in for web search over a JSON list of {"title", "url", "snippet"} entries.
+
+    Entries are ranked by how many query words they contain. The corpus is
+    read on first use.
+    """
+
+    def __init__(self, path: str = LOCAL_SEARCH_CORPUS):
+        self.path = path
+        self._entries = None
+
+    def _load(self) -> list:
+        if self._entries is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except FileNotFoundError:
+                logger.warning(f"Local search corpus {self.path} not found; searches return nothing")
+                self._entries = []
+        return self._entries
+
+    def search(self, query: str, k: int = 3) -> list[dict]:
+        words = set(normalize_query(query).split())
+        scored = []
+        for entry in self._load():
+            text = set(normalize_query(f"{entry['title']} {entry['snippet']}").split())
+            score = len(words & text)
+            if score:
+                scored.append((score, entry))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return [entry for _, entry in scored[:k]]
+
+
+local_search_backend = LocalSearch()
+
+
+def record_searched_query(state, agent_name: str, query: str) -> None:
+    key = SEARCHED_QUERIES_KEY.format(agent=agent_name)
+    # Reassigned rather than appended to, so ADK records the change in the event's state delta
+    state[key] = [*state.get(key, []), query]
+
+
+def local_search(query: str, tool_context=None) -> dict:
+    """Search legal sources for the query.
+
+    Args:
+        query (str): What to look for, e.g. "California non-compete statute".
+
+    Returns:
+        dict: results with title, url and snippet.
+    """
+    if tool_context is not None:
+        record_searched_query(tool_context.state, tool_context.agent_name, query)
+    return {"status": "success", "results": local_search_backend.search(query)}
+
+
+def search_tool():
+    """The search tool SearchAgent uses, picked by SEARCH_BACKEND."""
+    if SEARCH_BACKEND == "local":
+        return local_search
+    from google.adk.tools import google_search
+
+    return google_search
+
+
+def _content_text(content) -> str:
+    if content is None:
+        return ""
+    return "".join(part.text or "" for part in content.parts or [])
+
+
+def search_request(callback_context) -> str | None:
+    """What the search agent was asked to look up, normalized, or None if it was not asked anything specific.
+
+    Called through AgentTool, the tool's `request` argument arrives as the
+    agent's user content. Reached by a transfer or as a workflow step, the
+    user content is the end user's whole message (state["user_query"]);
+    what gets searched then depends on the conversation and is only known
+    from the queries the agent ran (see searched_queries).
+    """
+    text = _content_text(callback_context.user_content)
+    if not text or text == callback_context.state.get("user_query"):
+        return None
+    return normalize_query(text) or None
+
+
+def searched_queries(callback_context) -> list[str]:
+    """Queries the agent's current run searched, as recorded by local_search and record_grounding_queries."""
+    return list(callback_context.state.get(SEARCHED_QUERIES_KEY.format(agent=callback_context.agent_name)) or [])
+
+
+def record_grounding_queries(callback_context, llm_response) -> None:
+    """after_model_callback for search agents: record the queries Google Search ran for this response."""
+    metadata = llm_response.grounding_metadata
+    for query in (metadata.web_search_queries or []) if metadata else []:
+        record_searched_query(callback_context.state, callback_context.agent_name, query)
+    return None
+
+
+def reuse_search_results(callback_context):
+    """before_agent_callback for search agents: answer from an earlier search instead of running.
+
+    Only an explicit search request (see search_request) can be answered
+    this way: from state["search_results"] when they were produced for the
+    same request, and otherwise from the shared cache entry for it.
+    Returning None runs the search.
+    """
+    state = callback_context.state
+    state[SEARCHED_QUERIES_KEY.format(agent=callback_context.agent_name)] = []
+    request = search_request(callback_context)
+    if request is None:
+        return None
+    if state.get("search_results") and state.get("search_results_for") == request:
+        bundle = state["search_results"]
+        logger.info("Search skipped: results for this request are already in the session")
+    else:
+        bundle = search_cache.get(request)
+        if bundle is None:
+            return None
+        logger.info(f"Search cache hit ({search_cache.stats()})")
+        state["search_results"] = bundle
+        state["search_results_for"] = request
+    from google.genai import types
+
+    return types.Content(role="model", parts=[types.Part(text=bundle)])
+
+
+def remember_search_results(callback_context) -> None:
+    """after_agent_callback for search agents: store the new bundle in the shared cache.
+
+    It is stored under the explicit request, if any, and under every query
+    the search actually ran, so a later request for one of them reuses it.
+    """
+    state = callback_context.state
+    bundle = state.get("search_results")
+    if bundle:
+        request = search_request(callback_context)
+        for key in ([request] if request else []) + searched_queries(callback_context):
+            search_cache.put(key, bundle)
+        state["search_results_for"] = request
+    return None
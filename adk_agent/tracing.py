@@ -0,0 +1,16 @@
+# Langgraph_a2a/tracing.py is the only implementation. The ADK services run from this
+# directory without that one on the path, so this loads it and re-exports its helpers.
+import importlib.util
+import os
+import sys
+
+_NAME = "langgraph_a2a_tracing"
+if _NAME not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        _NAME, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Langgraph_a2a", "tracing.py")
+    )
+    sys.modules[_NAME] = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sys.modules[_NAME])
+
+record_span = sys.modules[_NAME].record_span
+span = sys.modules[_NAME].span
@@ -0,0 +1,119 @@
+import json
+import logging
+import re
+from typing import AsyncGenerator, Callable
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+LABELS = ("SUMMARIZE", "DRAFT_CLAUSE", "COMPLIANCE_CHECK")
+# Below this many characters the provided context is too thin to work from without a web search
+MIN_CONTEXT_CHARS = 50
+
+_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+
+def parse_label(raw) -> str | None:
+    """The label from the analyzer's task_label_json, or None if it is missing or not one of LABELS."""
+    if isinstance(raw, dict):
+        data = raw
+    else:
+        try:
+            data = json.loads(_FENCE.sub("", str(raw or "")))
+        except json.JSONDecodeError:
+            return None
+    label = data.get("label") if isinstance(data, dict) else None
+    return label if label in LABELS else None
+
+
+def context_is_thin(state) -> bool:
+    """True unless the request came with at least MIN_CONTEXT_CHARS of context (the `context` field of /run)."""
+    return len((state.get("context") or "").strip()) < MIN_CONTEXT_CHARS
+
+
+def _text(state, key: str) -> str:
+    return str(state.get(key) or "").strip()
+
+
+def render_final_answer(state) -> str | None:
+    """Assemble the final answer from the helper outputs without an LLM.
+
+    Returns None when the route is ambiguous: no valid label, or the output
+    the label calls for is empty.
+    """
+    label = parse_label(state.get("task_label_json"))
+    summary, drafted, compliance = _text(state, "summary"), _text(state, "drafted_clauses"), _text(state, "compliance_checked")
+    if label == "SUMMARIZE" and summary:
+        sections = [("Summary", summary)]
+    elif label == "DRAFT_CLAUSE" and drafted:
+        sections = [("Drafted Clauses", drafted)]
+        if compliance:
+            sections.append(("Compliance Notes", compliance))
+    elif label == "COMPLIANCE_CHECK" and compliance:
+        sections = [("Compliance Report", compliance)]
+    else:
+        return None
+    if _text(state, "search_results"):
+        sections.append(("Sources", _text(state, "search_results")))
+    return "\n\n".join(f"{title}\n\n{body}" for title, body in sections)
+
+
+class ConditionalAgent(BaseAgent):
+    """Runs its only sub-agent when `condition(state)` holds, otherwise does nothing.
+
+    Unlike a before_agent_callback returning content, skipping does not end
+    the surrounding invocation, so it can sit inside sequential and
+    parallel workflows.
+    """
+
+    condition: Callable[[dict], bool]
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if not self.condition(ctx.session.state):
+            logger.info(f"{self.name}: skipped")
+            return
+        async for event in self.sub_agents[0].run_async(ctx):
+            yield event
+
+
+class LabelRouter(BaseAgent):
+    """Runs the sub-agent that `branches` maps the analyzer's label to.
+
+    An unknown or missing label runs the `default` sub-agent.
+    """
+
+    branches: dict[str, str]
+    default: str
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        label = parse_label(ctx.session.state.get("task_label_json"))
+        name = self.branches.get(label, self.default)
+        logger.info(f"{self.name}: label {label} -> {name}")
+        async for event in self.find_sub_agent(name).run_async(ctx):
+            yield event
+
+
+class TemplateFormatter(BaseAgent):
+    """Writes state["final_answer"] from a fixed template when the route is unambiguous.
+
+    Falls back to running its only sub-agent (the LLM formatter) otherwise.
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        answer = render_final_answer(ctx.session.state)
+        if answer is None:
+            logger.info(f"{self.name}: ambiguous route, using the LLM formatter")
+            async for event in self.sub_agents[0].run_async(ctx):
+                yield event
+            return
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=answer)]),
+            actions=EventActions(state_delta={"final_answer": answer}),
+        )
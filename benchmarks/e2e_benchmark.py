@@ -0,0 +1,350 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import click
+import httpx
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LANGGRAPH_DIR = os.path.join(ROOT, "Langgraph_a2a")
+ADK_DIR = os.path.join(ROOT, "adk_agent")
+SAMPLE_PDF = os.path.join(ROOT, "rag", "US_Employment_Contract_Template.pdf")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+MCP_PORT = 8080  # fixed in server.py
+
+# Request kinds and the prompts they are drawn from
+PROMPTS = {
+    "rag": [
+        f"How many sick days does the employee get according to {SAMPLE_PDF}?",
+        f"What is the notice period for termination in {SAMPLE_PDF}?",
+        f"Which state's law governs the contract in {SAMPLE_PDF}?",
+    ],
+    "date": [
+        "Add 45 days to 2025-08-01.",
+        "Add 90 days to 2024-12-15.",
+        "Add 30 days to 2025-02-10.",
+    ],
+    "jurisdiction": [
+        "Is Texas a jurisdiction you support?",
+        "Can you handle a New York matter?",
+    ],
+    "drafting": [
+        "Draft a confidentiality clause for a software startup.",
+        "Draft a non-compete clause with a 12 month term.",
+    ],
+}
+# Hops in request order; "client" is the end-to-end latency seen by the load generator
+HOPS = ["client", "fastapi", "adk", "fast_path", "a2a", "langgraph", "llm", "mcp"]
+
+
+# --------------------------
+# Services
+# --------------------------
+def wait_for_port(port: int, process: subprocess.Popen, name: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{name} exited with code {process.returncode} before listening on port {port}")
+        try:
+            with socket.create_connection(("localhost", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.25)
+    raise TimeoutError(f"{name} did not listen on port {port} within {timeout:g}s")
+
+
+def start_services(workdir: str, env: dict, a2a_port: int, api_port: int, a2a_workers: int, timeout: float) -> list:
+    """Start the MCP server, the A2A server and the FastAPI app, each logging to workdir/<name>.log."""
+    specs = [
+        ("mcp", [sys.executable, "server.py"], LANGGRAPH_DIR, MCP_PORT),
+        ("a2a", [sys.executable, "__main__.py", "--port", str(a2a_port), "--workers", str(a2a_workers)], LANGGRAPH_DIR, a2a_port),
+        ("fastapi", [sys.executable, "-m", "uvicorn", "app:app", "--port", str(api_port)], ADK_DIR, api_port),
+    ]
+    processes = []
+    try:
+        for name, cmd, cwd, port in specs:
+            log = open(os.path.join(workdir, f"{name}.log"), "w")
+            process = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+            processes.append((name, process, log))
+            wait_for_port(port, process, name, timeout)
+            logger.info(f"{name} is up on port {port}")
+    except Exception:
+        stop_services(processes)
+        raise
+    return processes
+
+
+def stop_services(processes) -> None:
+    for _, process, _ in reversed(processes):
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+    for name, process, log in reversed(processes):
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"{name} did not stop in time, killing it")
+            process.kill()
+        log.close()
+
+
+def fake_env(workdir: str, a2a_port: int, llm_latency: float, embedding_latency: float, adk_latency: float) -> dict:
+    """Environment that swaps Gemini, web search and embeddings for local fakes and isolates all state in workdir."""
+    env = os.environ.copy()
+    env.update({
+        "LLM_BACKEND": "fake",
+        "EMBEDDING_BACKEND": "fake",
+        "ADK_MODEL_BACKEND": "fake",
+        "LLM_FAKE_LATENCY": str(llm_latency),
+        "EMBEDDING_FAKE_LATENCY": str(embedding_latency),
+        "ADK_FAKE_LATENCY": str(adk_latency),
+        "LLM_RATE_PER_SECOND": "0",
+        "ROUTER_EMBEDDING_MODEL": "",
+        "SEARCH_BACKEND": "local",
+        "GOOGLE_API_KEY": env.get("GOOGLE_API_KEY") or "offline-benchmark",
+        "BENCH_TRACE_FILE": os.path.join(workdir, "trace.jsonl"),
+        "RAG_INDEX_CACHE_DIR": os.path.join(workdir, "index_cache"),
+        "RAG_CORPUS_DIR": os.path.join(workdir, "corpus_index"),
+        "RAG_DOCUMENT_STORE_DIR": os.path.join(workdir, "documents"),
+        "A2A_TASK_DB": os.path.join(workdir, "a2a_tasks.sqlite"),
+        "LANGGRAPH_CHECKPOINT_DB": os.path.join(workdir, "langgraph_checkpoints.sqlite"),
+        "MCP_URL": f"http://localhost:{MCP_PORT}/mcp/",
+        "A2A_AGENT_CARD_URL": f"http://localhost:{a2a_port}/.well-known/agent.json",
+    })
+    return env
+
+
+# --------------------------
+# Load generation
+# --------------------------
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for item in mix.split(","):
+        kind, _, weight = item.partition("=")
+        if kind.strip() not in PROMPTS:
+            raise click.BadParameter(f"unknown request kind {kind!r}, expected one of {sorted(PROMPTS)}")
+        weights[kind.strip()] = float(weight or 1)
+    return weights
+
+
+def schedule(rate: float, duration: float, mix: dict, seed: int) -> list:
+    """Open-loop arrival schedule: Poisson arrivals at `rate` per second, kinds drawn from `mix`."""
+    rng = random.Random(seed)
+    kinds, weights = list(mix), list(mix.values())
+    arrivals, t = [], 0.0
+    while True:
+        t += rng.expovariate(rate)
+        if t >= duration:
+            return arrivals
+        kind = rng.choices(kinds, weights)[0]
+        arrivals.append((t, kind, rng.choice(PROMPTS[kind])))
+
+
+async def run_load(url: str, arrivals: list, timeout: float) -> tuple[list, float]:
+    """Send every request at its scheduled time, regardless of how earlier ones are doing."""
+    results = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        async def fire(at: float, kind: str, text: str) -> None:
+            await asyncio.sleep(max(0.0, start + at - loop.time()))
+            lag = (loop.time() - start - at) * 1000
+            t0 = time.perf_counter()
+            try:
+                resp = await client.post(url, json={"text": text})
+                ok = resp.status_code == 200
+                error = None if ok else f"HTTP {resp.status_code}"
+            except httpx.HTTPError as e:
+                ok, error = False, type(e).__name__
+            results.append({
+                "kind": kind,
+                "ms": (time.perf_counter() - t0) * 1000,
+                "ok": ok,
+                "error": error,
+                "send_lag_ms": lag,
+            })
+
+        await asyncio.gather(*[fire(*arrival) for arrival in arrivals])
+        elapsed = loop.time() - start
+    return results, elapsed
+
+
+# --------------------------
+# Reporting
+# --------------------------
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(values) -> dict:
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(values[-1], 3),
+    }
+
+
+def read_trace(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(results: list, elapsed: float, spans: list, config: dict) -> dict:
+    ok = [r for r in results if r["ok"]]
+    hops = defaultdict(list)
+    hops["client"] = [r["ms"] for r in ok]
+    tools = defaultdict(list)
+    for s in spans:
+        hops[s["hop"]].append(s["ms"])
+        if s["hop"] == "mcp":
+            tools[f"{s.get('tool')}:{s.get('outcome')}"].append(s["ms"])
+    by_kind = defaultdict(list)
+    for r in ok:
+        by_kind[r["kind"]].append(r["ms"])
+    errors = defaultdict(int)
+    for r in results:
+        if not r["ok"]:
+            errors[r["error"]] += 1
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": config,
+        "requests": {"sent": len(results), "ok": len(ok), "failed": len(results) - len(ok), "errors": dict(errors)},
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "max_send_lag_ms": round(max((r["send_lag_ms"] for r in results), default=0.0), 3),
+        "hops": {hop: latency_summary(hops.get(hop, [])) for hop in HOPS},
+        "by_kind": {kind: latency_summary(v) for kind, v in sorted(by_kind.items())},
+        "mcp_tools": {name: latency_summary(v) for name, v in sorted(tools.items())},
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """Hop percentiles that got more than `threshold` percent slower than the baseline run."""
+    regressions = []
+    for hop, stats in report["hops"].items():
+        base = baseline.get("hops", {}).get(hop, {})
+        for q in ("p50", "p95", "p99"):
+            if q in stats and base.get(q):
+                change = (stats[q] - base[q]) / base[q] * 100
+                if change > threshold:
+                    regressions.append(f"{hop} {q}: {base[q]:.1f} -> {stats[q]:.1f} ms (+{change:.0f}%)")
+    if report["throughput_rps"] < baseline.get("throughput_rps", 0) * (1 - threshold / 100):
+        regressions.append(f"throughput: {baseline['throughput_rps']:.2f} -> {report['throughput_rps']:.2f} rps")
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    req = report["requests"]
+    print(f"\n{req['ok']}/{req['sent']} ok in {report['elapsed_s']:.1f}s, {report['throughput_rps']:.2f} req/s")
+    if req["errors"]:
+        print(f"errors: {req['errors']}")
+    print(f"\n{'hop':<12}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+    for hop, s in report["hops"].items():
+        if s["count"]:
+            print(f"{hop:<12}{s['count']:>8}{s['p50']:>12.1f}{s['p95']:>12.1f}{s['p99']:>12.1f}")
+    print(f"\n{'kind':<12}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+    for kind, s in report["by_kind"].items():
+        print(f"{kind:<12}{s['count']:>8}{s['p50']:>12.1f}{s['p95']:>12.1f}{s['p99']:>12.1f}")
+
+
+@click.command()
+@click.option("--rate", default=2.0, help="Offered load in requests per second (open loop, Poisson arrivals).")
+@click.option("--duration", default=30.0, help="Seconds of load.")
+@click.option("--mix", default="rag=4,date=3,jurisdiction=1,drafting=2", help="Request kinds and weights.")
+@click.option("--seed", default=0, help="Seed for the arrival schedule.")
+@click.option("--llm-latency", default=0.3, help="Seconds per fake Gemini call (LangGraph and MCP server).")
+@click.option("--adk-latency", default=0.3, help="Seconds per fake Gemini call in the ADK agents.")
+@click.option("--embedding-latency", default=0.0005, help="Seconds per text for the fake embedding model.")
+@click.option("--a2a-port", default=10001)
+@click.option("--api-port", default=9090)
+@click.option("--a2a-workers", default=1, help="--workers for the A2A server.")
+@click.option("--fast-path/--no-fast-path", default=True, help="Let the ADK router answer tool-shaped queries directly.")
+@click.option("--sdk-mode", type=click.Choice(["agents", "workflow"]), default="agents", help="ADK_SDK_MODE for the drafting pipeline.")
+@click.option("--timeout", default=120.0, help="Per-request timeout in seconds.")
+@click.option("--warmup", default=4, help="Requests sent (one kind after another) before measuring.")
+@click.option("--output", default=None, help="Where to write the JSON results (default benchmarks/results/e2e-<time>.json).")
+@click.option("--baseline", default=None, help="Earlier results file to compare against.")
+@click.option("--regression-threshold", default=20.0, help="Percent slowdown versus the baseline that fails the run.")
+def main(rate, duration, mix, seed, llm_latency, adk_latency, embedding_latency, a2a_port, api_port, a2a_workers,
+         fast_path, sdk_mode, timeout, warmup, output, baseline, regression_threshold):
+    """Offline end-to-end benchmark: FastAPI -> ADK -> A2A -> LangGraph -> MCP, with every model faked."""
+    weights = parse_mix(mix)
+    config = {
+        "rate": rate, "duration": duration, "mix": weights, "seed": seed, "llm_latency": llm_latency,
+        "adk_latency": adk_latency, "embedding_latency": embedding_latency, "a2a_workers": a2a_workers,
+        "fast_path": fast_path,
+        "sdk_mode": sdk_mode,
+    }
+    workdir = tempfile.mkdtemp(prefix="legal-bench-")
+    env = fake_env(workdir, a2a_port, llm_latency, embedding_latency, adk_latency)
+    env["FAST_PATH"] = "1" if fast_path else "0"
+    env["ADK_SDK_MODE"] = sdk_mode
+    url = f"http://localhost:{api_port}/run"
+    logger.info(f"Service logs and traces in {workdir}")
+
+    processes = start_services(workdir, env, a2a_port, api_port, a2a_workers, timeout=120)
+    try:
+        kinds = list(weights)
+        warmup_arrivals = [(0.0, kinds[i % len(kinds)], PROMPTS[kinds[i % len(kinds)]][0]) for i in range(warmup)]
+        warm, _ = asyncio.run(run_load(url, warmup_arrivals, timeout))
+        if warm and not any(r["ok"] for r in warm):
+            raise RuntimeError(f"Every warm-up request failed: {warm[0]['error']}; see the logs in {workdir}")
+        # Only measured requests count
+        trace_path = env["BENCH_TRACE_FILE"]
+        open(trace_path, "w").close()
+
+        arrivals = schedule(rate, duration, weights, seed)
+        logger.info(f"Sending {len(arrivals)} requests over {duration:g}s")
+        results, elapsed = asyncio.run(run_load(url, arrivals, timeout))
+    finally:
+        stop_services(processes)
+
+    report = summarize(results, elapsed, read_trace(env["BENCH_TRACE_FILE"]), config)
+    print_report(report)
+
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"e2e-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if baseline:
+        with open(baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), regression_threshold)
+        if regressions:
+            print("\nRegressions versus baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions versus baseline.")
+
+
+if __name__ == "__main__":
+    main()
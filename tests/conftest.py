@@ -0,0 +1,7 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The services import their modules flat, the way they are run from their own directories
+for directory in ("Langgraph_a2a", "adk_agent"):
+    sys.path.insert(0, os.path.join(ROOT, directory))
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain.schema")
+from langchain.schema import Document
+
+from corpus_index import CorpusIndex
+
+DIM = 32
+DOCS = 150
+CHUNKS_PER_DOC = 20
+
+
+def make_corpus(tmp_path, name, **kwargs):
+    rng = np.random.default_rng(0)
+    index = CorpusIndex(root=str(tmp_path / name), autosave=False, **kwargs)
+    for d in range(DOCS):
+        vectors = rng.normal(size=(CHUNKS_PER_DOC, DIM)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        chunks = [Document(page_content=f"doc {d} chunk {c}", metadata={}) for c in range(CHUNKS_PER_DOC)]
+        index.add_document(f"doc-{d}", chunks, vectors, {"group": d % 3})
+    return index
+
+
+def queries(n=30):
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(n, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def ids(results):
+    return [doc.metadata["chunk_id"] for doc, _ in results]
+
+
+@pytest.fixture(scope="module")
+def flat(tmp_path_factory):
+    return make_corpus(tmp_path_factory.mktemp("flat"), "flat", ann_threshold=10**9)
+
+
+@pytest.mark.parametrize("kind", ["ivf", "hnsw"])
+def test_filtered_search_matches_flat(tmp_path, flat, kind):
+    ann = make_corpus(tmp_path, kind, ann_threshold=1000, ann_kind=kind, nprobe=1)
+    assert ann.kind == kind
+    for q in queries():
+        assert ids(ann.search(q, k=5, doc_ids=["doc-7"])) == ids(flat.search(q, k=5, doc_ids=["doc-7"]))
+        assert ids(ann.search(q, k=5, where={"group": 2})) == ids(flat.search(q, k=5, where={"group": 2}))
+
+
+def test_filtered_search_skips_removed_documents(tmp_path, flat):
+    ann = make_corpus(tmp_path, "hnsw", ann_threshold=1000, ann_kind="hnsw")
+    ann.remove_document("doc-7")
+    q = queries(1)[0]
+    assert ann.search(q, k=5, doc_ids=["doc-7"]) == []
+    assert all(doc.metadata["doc_id"] != "doc-7" for doc, _ in ann.search(q, k=5, where={"group": 1}))
+
+
+def test_ivf_filtered_search_after_reload(tmp_path, flat):
+    ann = make_corpus(tmp_path, "ivf", ann_threshold=1000, ann_kind="ivf", nprobe=1)
+    ann.save()
+    reloaded = CorpusIndex(root=ann.root, autosave=False)
+    assert reloaded.kind == "ivf"
+    q = queries(1)[0]
+    assert ids(reloaded.search(q, k=5, doc_ids=["doc-3"])) == ids(flat.search(q, k=5, doc_ids=["doc-3"]))
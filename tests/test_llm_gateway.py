@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from llm_gateway import BackendError, FakeBackend, LLMGateway
+
+
+def gateway(backend, **kwargs):
+    return LLMGateway(backend, rate=0, base_delay=0.001, max_delay=0.001, **kwargs)
+
+
+def test_identical_concurrent_prompts_share_one_call():
+    backend = FakeBackend(latency=0.05)
+    llm = gateway(backend)
+
+    async def main():
+        return await asyncio.gather(*[llm.generate("same prompt") for _ in range(5)], llm.generate("other prompt"))
+
+    answers = asyncio.run(main())
+    assert len(set(answers[:5])) == 1
+    assert backend.calls == 2
+    assert llm.stats()["coalesced"] == 4
+    assert llm.stats()["in_flight"] == 0
+
+
+def test_retryable_errors_are_retried():
+    backend = FakeBackend(latency=0, failures=2)
+    llm = gateway(backend, max_retries=3)
+    assert asyncio.run(llm.generate("prompt")).startswith("[")
+    assert backend.calls == 3
+    assert llm.stats()["retried"] == 2
+
+
+def test_gives_up_after_max_retries():
+    backend = FakeBackend(latency=0, failures=5)
+    llm = gateway(backend, max_retries=2)
+    with pytest.raises(BackendError):
+        asyncio.run(llm.generate("prompt"))
+    assert backend.calls == 3
+    assert llm.stats()["failed"] == 1
+
+
+def test_non_retryable_errors_are_raised_at_once():
+    calls = 0
+
+    async def factory():
+        nonlocal calls
+        calls += 1
+        raise BackendError(400, "bad request")
+
+    with pytest.raises(BackendError):
+        asyncio.run(gateway(None).call(factory))
+    assert calls == 1
+
+
+def test_retry_budget_limits_retries_across_calls():
+    backend = FakeBackend(latency=0, failures=100)
+    llm = gateway(backend, max_retries=5, retry_budget=0)
+    llm.budget.floor = 1
+
+    async def main():
+        for prompt in ("a", "b", "c"):
+            with pytest.raises(BackendError):
+                await llm.generate(prompt)
+
+    asyncio.run(main())
+    assert llm.stats()["retried"] == 1
+
+
+def test_shared_call_is_cancelled_when_every_caller_gives_up():
+    started, cancelled = asyncio.Event(), []
+
+    async def factory():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        llm = gateway(None)
+        callers = [asyncio.create_task(llm.call(factory, key="k")) for _ in range(2)]
+        await started.wait()
+        callers[0].cancel()
+        await asyncio.sleep(0.01)
+        assert not cancelled  # the other caller still wants the result
+        callers[1].cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        assert cancelled
+        assert llm.stats()["in_flight"] == 0
+
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("langchain_core")
+
+from mcp_pool import MCPToolPool
+
+
+class FlakySession:
+    """Drops the connection on the first `failures` calls, after the server has run them."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = []
+
+    async def call_tool(self, name, arguments):
+        self.calls.append(name)
+        if len(self.calls) <= self.failures:
+            raise ConnectionError("connection dropped")
+        return SimpleNamespace(content=[SimpleNamespace(text="ok")], isError=False)
+
+
+class FakePool(MCPToolPool):
+    def __init__(self, session: FlakySession):
+        super().__init__(size=1, refresh_interval=0)
+        self.session = session
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            fn, future = await self._requests.get()
+            try:
+                future.set_result(await fn(self.session))
+            except Exception as e:
+                future.set_exception(e)
+
+
+def test_pure_tool_is_retried_after_a_transport_failure():
+    async def main():
+        pool = FakePool(FlakySession(failures=1))
+        assert await pool.call_tool("add_days_to_date", {"input_date": "2025-08-01", "duration_days": 45}) == "ok"
+        await pool.close()
+        return pool.session.calls
+
+    assert asyncio.run(main()) == ["add_days_to_date", "add_days_to_date"]
+
+
+def test_state_changing_tool_is_not_sent_twice():
+    async def main():
+        pool = FakePool(FlakySession(failures=1))
+        with pytest.raises(ConnectionError):
+            await pool.call_tool("register_document", {"path": "contract.pdf"})
+        await pool.close()
+        return pool.session.calls
+
+    assert asyncio.run(main()) == ["register_document"]
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("google.genai")
+pytest.importorskip("mcp")
+
+import router
+from router import FastPathRouter, IntentClassifier
+
+
+@pytest.mark.parametrize(
+    "query, tool, arguments",
+    [
+        ("Add 45 days to 2025-08-01.", "add_days_to_date", {"input_date": "2025-08-01", "duration_days": "45"}),
+        ("Is Texas supported?", "jurisdiction_checker", {"jurisdiction": "Texas"}),
+        ("is west virginia a valid jurisdiction", "jurisdiction_checker", {"jurisdiction": "West Virginia"}),
+    ],
+)
+def test_rules_route_tool_shaped_queries(query, tool, arguments):
+    route = FastPathRouter(None).route(query)
+    assert route is not None
+    assert (route.tool, route.arguments) == (tool, arguments)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "Is this Texas non-compete valid?",
+        "Is the California arbitration clause supported?",
+        "Is my New York lease valid?",
+    ],
+)
+def test_jurisdiction_rule_needs_a_bare_state_name(query):
+    assert FastPathRouter(None).route(query) is None
+
+
+def test_classifier_is_opt_in():
+    assert router.ROUTER_EMBEDDING_MODEL or router.router.classifier is None
+
+
+def test_classifier_loads_once_across_threads(monkeypatch):
+    loads = []
+
+    class Model:
+        def __init__(self, name):
+            loads.append(name)
+            time.sleep(0.05)
+
+        def encode(self, texts, normalize_embeddings=True):
+            import numpy as np
+
+            return np.ones((len(texts), 2)) if isinstance(texts, list) else np.ones(2)
+
+    sentence_transformers = pytest.importorskip("sentence_transformers")
+    monkeypatch.setattr(sentence_transformers, "SentenceTransformer", Model)
+    classifier = IntentClassifier("test-model")
+    threads = [threading.Thread(target=classifier.classify, args=("Is Texas supported?",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == ["test-model"]
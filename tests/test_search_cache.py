@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import pytest
+
+import search_cache
+from search_cache import (
+    SearchResultCache,
+    local_search,
+    normalize_query,
+    record_grounding_queries,
+    remember_search_results,
+    reuse_search_results,
+    search_request,
+)
+
+USER_QUERY = "Draft a non-compete clause for our California engineers."
+
+
+def context(text: str, state: dict | None = None, agent_name: str = "SearchAgent"):
+    content = SimpleNamespace(parts=[SimpleNamespace(text=text)])
+    return SimpleNamespace(user_content=content, state={"user_query": USER_QUERY, **(state or {})}, agent_name=agent_name)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(search_cache, "search_cache", SearchResultCache())
+
+
+def test_cache_entries_expire_and_are_evicted_least_recently_used_first():
+    cache = SearchResultCache(ttl=60, max_entries=2)
+    cache.put("California non-compete", "a")
+    cache.put("Texas non-compete", "b")
+    assert cache.get("  california NON-COMPETE? ") == "a"
+    cache.put("FMLA leave", "c")
+    assert cache.get("Texas non-compete") is None
+    assert cache.get("California non-compete") == "a"
+    assert SearchResultCache(ttl=-1).get("anything") is None
+
+
+def test_agent_tool_request_is_the_key_and_the_user_message_is_not():
+    assert search_request(context("California non-compete STATUTE")) == "california non compete statute"
+    # Reached by a transfer or a workflow step the agent only sees the end user's message
+    assert search_request(context(USER_QUERY)) is None
+
+
+def test_session_results_are_only_reused_for_the_same_request():
+    pytest.importorskip("google.genai")
+    state = {}
+    first = context("California non-compete statute", state)
+    first.state["search_results"] = "bundle about 16600"
+    remember_search_results(first)
+
+    same = context("california non-compete statute?", first.state)
+    assert reuse_search_results(same).parts[0].text == "bundle about 16600"
+
+    other = context("Defend Trade Secrets Act notice", first.state)
+    assert reuse_search_results(other) is None
+
+
+def test_different_request_in_the_same_turn_is_not_answered_from_the_session():
+    ctx = context("Defend Trade Secrets Act notice", {
+        "search_results": "bundle about 16600",
+        "search_results_for": normalize_query("California non-compete statute"),
+    })
+    assert reuse_search_results(ctx) is None
+
+
+def test_transfer_path_caches_under_the_queries_actually_run():
+    ctx = context(USER_QUERY, {"search:queries:SearchAgent": ["left over from the last run"]})
+    assert reuse_search_results(ctx) is None
+
+    # What the search tool and Google Search grounding record while the agent runs
+    local_search("California non-compete statute", tool_context=ctx)
+    grounding = SimpleNamespace(web_search_queries=["Business and Professions Code 16600"])
+    record_grounding_queries(ctx, SimpleNamespace(grounding_metadata=grounding))
+    record_grounding_queries(ctx, SimpleNamespace(grounding_metadata=None))
+    # Another search agent in the same session keeps its own list
+    local_search("not mine", tool_context=SimpleNamespace(state=ctx.state, agent_name="WorkflowSearch"))
+    assert ctx.state["search:queries:WorkflowSearch"] == ["not mine"]
+
+    ctx.state["search_results"] = "bundle"
+    remember_search_results(ctx)
+
+    assert ctx.state["search_results_for"] is None
+    assert search_cache.search_cache.get("california non-compete statute") == "bundle"
+    assert search_cache.search_cache.get("business and professions code 16600") == "bundle"
+    assert search_cache.search_cache.get(USER_QUERY) is None
+    assert search_cache.search_cache.get("left over from the last run") is None
+    assert search_cache.search_cache.get("not mine") is None
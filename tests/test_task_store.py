@@ -0,0 +1,150 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+pytest.importorskip("a2a")
+from a2a.types import Task, TaskState, TaskStatus
+
+from task_store import SqliteTaskStore, StoreBackedQueueManager
+
+
+def task(task_id: str, state: TaskState) -> Task:
+    return Task(id=task_id, context_id="ctx", status=TaskStatus(state=state))
+
+
+def store(tmp_path, **kwargs) -> SqliteTaskStore:
+    return SqliteTaskStore(str(tmp_path / "tasks.sqlite"), **kwargs)
+
+
+def state_of(s: SqliteTaskStore, task_id: str):
+    found = asyncio.run(s.get(task_id))
+    return None if found is None else TaskState(found.status.state)
+
+
+def test_late_working_update_does_not_reopen_a_finished_task(tmp_path):
+    s = store(tmp_path, write_behind=0)
+    asyncio.run(s.save(task("t1", TaskState.completed)))
+    asyncio.run(s.save(task("t1", TaskState.working)))
+    assert state_of(s, "t1") == TaskState.completed
+    asyncio.run(s.save(task("t1", TaskState.failed)))
+    assert state_of(s, "t1") == TaskState.failed
+
+
+def test_working_updates_are_buffered_until_flush(tmp_path):
+    async def main():
+        s = store(tmp_path, write_behind=60)
+        other = store(tmp_path)
+        await s.save(task("t1", TaskState.working))
+        assert TaskState((await s.get("t1")).status.state) == TaskState.working
+        assert await other.get("t1") is None
+        await s.flush()
+        assert TaskState((await other.get("t1")).status.state) == TaskState.working
+
+    asyncio.run(main())
+
+
+def test_evicts_expired_and_surplus_finished_tasks(tmp_path):
+    s = store(tmp_path, write_behind=0, ttl=3600, max_tasks=2)
+    for i in range(4):
+        asyncio.run(s.save(task(f"done-{i}", TaskState.completed)))
+    asyncio.run(s.save(task("running", TaskState.working)))
+    s._execute("UPDATE tasks SET updated = updated - 7200 WHERE id = 'done-0'")
+    assert s.evict() == 2
+    assert state_of(s, "done-0") is None
+    assert state_of(s, "done-1") is None
+    assert state_of(s, "done-3") == TaskState.completed
+    assert state_of(s, "running") == TaskState.working
+
+
+def test_fail_interrupted_only_touches_tasks_of_dead_owners(tmp_path):
+    live, dead = store(tmp_path, write_behind=0), store(tmp_path, write_behind=0)
+    asyncio.run(live.save(task("live", TaskState.working)))
+    asyncio.run(dead.save(task("dead", TaskState.working)))
+    live.heartbeat()
+    dead.heartbeat()
+    dead._execute("UPDATE owners SET heartbeat = ? WHERE owner = ?", (time.time() - 3600, dead.owner))
+
+    assert store(tmp_path).fail_interrupted(owner_timeout=30) == 1
+    assert state_of(live, "live") == TaskState.working
+    assert state_of(live, "dead") == TaskState.failed
+
+
+def test_cancel_request_reaches_the_owning_store(tmp_path):
+    async def main():
+        owner, other = store(tmp_path, write_behind=0), store(tmp_path, write_behind=0)
+        await owner.save(task("t1", TaskState.working))
+        await owner.save(task("t2", TaskState.completed))
+        assert await other.request_cancel("t1")
+        assert not await other.request_cancel("t2")
+        assert not await other.request_cancel("missing")
+
+        cancelled = []
+
+        async def on_cancel(task_id):
+            cancelled.append(task_id)
+
+        watcher = asyncio.create_task(owner.watch(on_cancel, interval=0.01))
+        await asyncio.sleep(0.1)
+        watcher.cancel()
+        await asyncio.gather(watcher, return_exceptions=True)
+        assert cancelled == ["t1"]
+
+    asyncio.run(main())
+
+
+def test_follow_stops_when_the_queue_is_closed(tmp_path):
+    async def main():
+        s = store(tmp_path, write_behind=0)
+        await s.save(task("t1", TaskState.working))
+        manager = StoreBackedQueueManager(s, interval=0.01)
+        queue = await manager.tap("t1")
+        assert queue is not None
+
+        def followers():
+            return [t for t in asyncio.all_tasks() if t.get_coro().__qualname__ == "StoreBackedQueueManager._follow"]
+
+        assert followers()
+        await queue.close()
+        await asyncio.sleep(0.05)
+        assert not followers()
+
+    asyncio.run(main())
+
+
+def test_adds_new_columns_to_an_existing_database(tmp_path):
+    path = tmp_path / "tasks.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE tasks (id TEXT PRIMARY KEY, context_id TEXT NOT NULL, state TEXT NOT NULL, updated REAL NOT NULL, data TEXT NOT NULL)")
+    conn.commit()
+    conn.close()
+    s = SqliteTaskStore(str(path), write_behind=0)
+    asyncio.run(s.save(task("t1", TaskState.working)))
+    assert asyncio.run(s.request_cancel("t1"))
+
+
+def test_push_configs_are_shared_between_workers_and_evicted_with_their_task(tmp_path):
+    from a2a.types import PushNotificationConfig
+
+    from task_store import SqlitePushNotificationConfigStore
+
+    async def main():
+        owner, other = store(tmp_path, write_behind=0, max_tasks=1), store(tmp_path, write_behind=0)
+        await owner.save(task("t1", TaskState.working))
+        await SqlitePushNotificationConfigStore(other).set_info("t1", PushNotificationConfig(url="http://client/a"))
+        await SqlitePushNotificationConfigStore(other).set_info("t1", PushNotificationConfig(id="b", url="http://client/b"))
+
+        configs = await SqlitePushNotificationConfigStore(owner).get_info("t1")
+        assert [(c.id, c.url) for c in configs] == [("t1", "http://client/a"), ("b", "http://client/b")]
+
+        await SqlitePushNotificationConfigStore(owner).delete_info("t1")
+        assert [c.id for c in await SqlitePushNotificationConfigStore(other).get_info("t1")] == ["b"]
+
+        await owner.save(task("t1", TaskState.completed))
+        await owner.save(task("t2", TaskState.completed))
+        owner._execute("UPDATE tasks SET updated = updated - 10 WHERE id = 't1'")
+        assert owner.evict() == 1
+        assert await SqlitePushNotificationConfigStore(owner).get_info("t1") == []
+
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+import importlib.util
+import json
+import os
+import sys
+
+import pytest
+
+import tracing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+shared = sys.modules["langgraph_a2a_tracing"]
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "trace.jsonl")
+    monkeypatch.setattr(shared, "TRACE_FILE", path)
+    return path
+
+
+def records(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_both_services_use_the_same_implementation():
+    assert os.path.samefile(shared.__file__, os.path.join(ROOT, "Langgraph_a2a", "tracing.py"))
+    assert (tracing.span, tracing.record_span) == (shared.span, shared.record_span)
+
+
+def test_nothing_is_written_without_a_trace_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared, "TRACE_FILE", None)
+    with tracing.span("adk"):
+        pass
+    assert os.listdir(tmp_path) == []
+
+
+def test_nested_spans_write_one_record_each_innermost_first(trace_file):
+    with tracing.span("a2a", task_id="t1"):
+        with tracing.span("llm"):
+            pass
+        tracing.record_span("mcp", 12.3456, tool="add_days_to_date", outcome="hit")
+
+    llm, mcp, a2a = records(trace_file)
+    assert [llm["hop"], mcp["hop"], a2a["hop"]] == ["llm", "mcp", "a2a"]
+    assert a2a["task_id"] == "t1" and a2a["ok"] is True
+    assert a2a["ms"] >= llm["ms"] >= 0
+    assert mcp == {**mcp, "ms": 12.346, "tool": "add_days_to_date", "outcome": "hit", "pid": os.getpid()}
+    assert all(isinstance(r["t"], float) for r in (llm, mcp, a2a))
+
+
+def test_failed_span_is_recorded_and_the_error_propagates(trace_file):
+    with pytest.raises(RuntimeError):
+        with tracing.span("fast_path", tool="jurisdiction_checker"):
+            raise RuntimeError("tool down")
+    (record,) = records(trace_file)
+    assert (record["hop"], record["ok"], record["tool"]) == ("fast_path", False, "jurisdiction_checker")
+
+
+def test_benchmark_summarizes_the_recorded_hops(trace_file):
+    pytest.importorskip("click")
+    pytest.importorskip("httpx")
+    spec = importlib.util.spec_from_file_location("e2e_benchmark", os.path.join(ROOT, "benchmarks", "e2e_benchmark.py"))
+    benchmark = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(benchmark)
+
+    with tracing.span("fastapi"):
+        with tracing.span("adk"):
+            tracing.record_span("mcp", 5.0, tool="rag_query", outcome="call")
+    report = benchmark.summarize([], 1.0, benchmark.read_trace(trace_file), {})
+
+    assert {hop for hop, stats in report["hops"].items() if stats["count"]} == {"fastapi", "adk", "mcp"}
+    assert report["mcp_tools"]["rag_query:call"]["count"] == 1